@@ -0,0 +1,83 @@
+import time
+import math
+import logging
+from termcolor import colored
+import ipyparallel as ipp
+
+# Resize a stack between bounds, following the ipyparallel controller's task queue
+class Autoscaler(object):
+    def __init__(self, stack, min_size=1, max_size=8, tasks_per_engine=2, idle_timeout=600, interval=30, client=None):
+        self.stack = stack
+        self.min_size = min_size
+        self.max_size = max_size
+        # Pending tasks per engine above which we add hosts
+        self.tasks_per_engine = tasks_per_engine
+        # Seconds all engines must stay idle before we remove hosts
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.client = client
+        # Whether we opened the client, and close it
+        self.owned = False
+        self.idle_since = {}
+        self.running = False
+
+    def measure(self):
+        # Read the pending task count and the idle time of each engine
+        status = self.connect().queue_status()
+        now = time.time()
+        engines = {engine: value for engine, value in status.items() if engine != 'unassigned'}
+        pending = status.get('unassigned', 0) + sum(value['queue'] for value in engines.values())
+        for engine, value in engines.items():
+            if value['queue'] or value['tasks']:
+                self.idle_since.pop(engine, None)
+            else:
+                self.idle_since.setdefault(engine, now)
+        for engine in list(self.idle_since):
+            if engine not in engines:
+                del self.idle_since[engine]
+        idle = {engine: now-self.idle_since[engine] for engine in self.idle_since}
+        return len(engines), pending, idle
+
+    def connect(self):
+        # One client for the life of the autoscaler, opening one per poll leaks sockets
+        if self.client is None:
+            self.client = ipp.Client()
+            self.owned = True
+        return self.client
+
+    def target(self, engines, pending, idle):
+        size = self.stack.cluster.size
+        engines_per_host = max(1, engines//max(1, size))
+        if pending > self.tasks_per_engine*engines:
+            # Enough hosts to bring the queue down to tasks_per_engine per engine
+            size = math.ceil(pending/(self.tasks_per_engine*engines_per_host))
+        elif engines and not pending and len(idle) == engines and min(idle.values()) >= self.idle_timeout:
+            # Nothing runs anymore, removing hosts cannot lose a task
+            size = self.min_size
+        return min(self.max_size, max(self.min_size, size))
+
+    def step(self):
+        engines, pending, idle = self.measure()
+        size = self.target(engines, pending, idle)
+        logging.info("{} engines, {} pending tasks, target size {}".format(engines, pending, size))
+        if size != self.stack.cluster.size:
+            logging.info(colored("Autoscale from {} to {}".format(self.stack.cluster.size, size), 'yellow'))
+            self.stack.resize(size)
+            self.idle_since.clear()
+        return size
+
+    def run(self):
+        self.running = True
+        while self.running:
+            try:
+                self.step()
+            except Exception as e:
+                logging.warning(colored(e, 'yellow'))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        if self.owned:
+            self.client.close()
+            self.client = None
+            self.owned = False
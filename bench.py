@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+import shlex
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import asyncio
+import asyncssh
+import boto3
+import tracing
+import pool
+from session import Session
+from store import Store
+from cluster import Cluster
+from stack import Stack
+from utilities import STEPS
+from topology import TOPOLOGY_COMMAND
+
+'''
+Bring-up benchmarks against moto mocked AWS and in-process SSH stand-ins, e.g.
+pip install moto
+python bench.py --sizes 1 10 50 200 --output bench.json
+'''
+
+# Version of the output format, bump it when the meaning of a field changes
+FORMAT = 1
+SIZES = (1, 10, 50, 200)
+STACKS = (10, 100, 1000)
+REGION = 'eu-west-1'
+PORT = 8022
+# Topology reported by the SSH stand-ins, 4 cores and no GPU
+TOPOLOGY = '0\n0,0\n1,0\n2,0\n3,0\n'
+SECURITY = '/home/ubuntu/.ipython/profile_default/security'
+
+def measure(name, action, **parameters):
+    # Time an action, counting the AWS API calls and remote commands it made from its spans
+    tracing.clear()
+    start = time.perf_counter()
+    action()
+    seconds = time.perf_counter()-start
+    calls = {}
+    commands = 0
+    for span in tracing.recorded():
+        if span.name.startswith('aws.'):
+            calls[span.name[len('aws.'):]] = calls.get(span.name[len('aws.'):], 0)+1
+        elif span.name in ('ssh.execute', 'ssh.status', 'ssh.put', 'ssh.get'):
+            commands += 1
+    result = dict(parameters, name=name, seconds=round(seconds, 6), api_calls=sum(calls.values()),
+        api_calls_by_operation=dict(sorted(calls.items())), remote_commands=commands)
+    logging.warning("{} {} {:.3f}s {} API calls {} remote commands".format(name, parameters, seconds, result['api_calls'], commands))
+    return result
+
+# AWS lifecycle, against moto
+def aws(sizes):
+    from moto import mock_aws
+    results = []
+    # A throwaway key pair to import
+    Cluster.ssh_key_path = os.path.abspath('bench.pub')
+    asyncssh.generate_private_key('ssh-rsa').convert_to_public().write_public_key(Cluster.ssh_key_path)
+    for size in sizes:
+        with mock_aws():
+            # Clients opened under a previous mock hold its state
+            pool.clear()
+            Cluster.cache.invalidate()
+            boto3.client('iam', region_name=REGION).create_instance_profile(InstanceProfileName='EMR_EC2_DefaultRole')
+            image_id = boto3.client('ec2', region_name=REGION).describe_images()['Images'][0]['ImageId']
+            store = Store(id='bench-{}'.format(size), profile_name=None, region_name=REGION)
+            results.append(measure('store.create', store.create, size=size))
+            results.append(measure('store.terminate', store.terminate, size=size))
+            cluster = Cluster(id='bench-{}'.format(size), size=size, profile_name=None, region_name=REGION, image_id=image_id, instance_type='m5.large')
+            results.append(measure('cluster.create', cluster.create, size=size))
+            # A cluster as unfrozen from a session, loading everything
+            cluster = Session.loads(Session.dumps(cluster))
+            results.append(measure('cluster.load', cluster.load, size=size))
+            results.append(measure('cluster.stop', cluster.stop, size=size))
+            results.append(measure('cluster.start', cluster.start, size=size))
+            results.append(measure('cluster.terminate', cluster.terminate, size=size))
+    return results
+
+# Session I/O, with many stored stacks
+def session(counts, path='session'):
+    results = []
+    for count in counts:
+        shutil.rmtree(path, ignore_errors=True)
+        stacks = {'bench-{}'.format(index): {
+                'store': Store(id='bench-{}'.format(index), profile_name=None, region_name=REGION),
+                'cluster': Cluster(id='bench-{}'.format(index), size=4, profile_name=None, region_name=REGION, image_id='ami-00000000', subnet_id='subnet-00000000'),
+            } for index in range(count)}
+        def dump():
+            with Session(path) as stored:
+                for key, value in stacks.items():
+                    stored[key] = value
+        def load_one():
+            with Session(path) as stored:
+                stored['bench-0']['cluster'].size
+        def load_all():
+            with Session(path) as stored:
+                for key in stored.keys():
+                    stored[key]
+        def update_one():
+            with Session(path) as stored:
+                stored['bench-0']['cluster'].size += 1
+        results.append(measure('session.dump', dump, stacks=count))
+        results.append(measure('session.load_one', load_one, stacks=count))
+        results.append(measure('session.load_all', load_all, stacks=count))
+        results.append(measure('session.update_one', update_one, stacks=count))
+        results[-1]['bytes'] = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    shutil.rmtree(path, ignore_errors=True)
+    return results
+
+# SSH stand-in, answering venom's remote commands instantly and keeping the step fingerprints
+class Server(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        # No authentication
+        return False
+
+class Host(object):
+    def __init__(self, root, latency=0):
+        self.root = root
+        self.latency = latency
+        self.steps = {}
+        os.makedirs(os.path.join(root, SECURITY.lstrip('/')), exist_ok=True)
+        os.makedirs(os.path.join(root, 'home/ubuntu/venom'), exist_ok=True)
+        for name in ('ipcontroller-client.json', 'ipcontroller-engine.json'):
+            with open(os.path.join(root, SECURITY.lstrip('/'), name), 'w') as file:
+                file.write('{}')
+
+    def answer(self, command):
+        # Output and exit status of a command, commands mostly come through a login shell
+        words = shlex.split(command)
+        if words[:3] == ['bash', '-l', '-c'] or words[:4] == ['sudo', 'bash', '-l', '-c']:
+            command = words[-1]
+        if command == TOPOLOGY_COMMAND:
+            return TOPOLOGY, 0
+        if command.startswith('mkdir -p {}'.format(STEPS)):
+            return ''.join('{} {}\n'.format(name, value) for name, value in sorted(self.steps.items())), 0
+        # Nobody holds the dpkg locks
+        if 'fuser' in command:
+            return '', 1
+        match = re.match(r"echo '(\w+)' > {}/(\S+)$".format(re.escape(STEPS)), command.strip())
+        if match:
+            self.steps[match.group(2)] = match.group(1)
+        return '', 0
+
+    async def handle(self, process):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output, status = self.answer(process.command)
+        process.stdout.write(output)
+        process.exit(status)
+
+class Servers(object):
+    # One stand-in per loopback address, served from a background event loop
+    def __init__(self, count, root, port=PORT, latency=0):
+        self.names = ['127.0.0.{}'.format(index+1) for index in range(count)]
+        self.hosts = [Host(os.path.join(root, name), latency) for name in self.names]
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.servers = asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    async def start(self):
+        key = asyncssh.generate_private_key('ssh-ed25519')
+        return await asyncio.gather(*[asyncssh.create_server(Server, name, self.port, server_host_keys=[key],
+                process_factory=host.handle, sftp_factory=lambda channel, root=host.root: asyncssh.SFTPServer(channel, chroot=root))
+            for name, host in zip(self.names, self.hosts)])
+
+    def close(self):
+        for server in self.servers:
+            self.loop.call_soon_threadsafe(server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+# The part of a cluster Stack.setup uses, pointing at the stand-ins
+class Hosts(object):
+    instance_user = 'ubuntu'
+    def __init__(self, hosts):
+        self.hosts = hosts
+
+    def load(self, force=False, fields=()):
+        return self
+
+class BenchStack(Stack):
+    ssh_options = {'port': PORT, 'client_keys': None, 'agent_path': None}
+    def __init__(self, id, hosts):
+        self.id = id
+        self.stack = {}
+        self.store = Store(id=id, profile_name=None, region_name=REGION)
+        self.cluster = Hosts(hosts)
+
+def setup(sizes, root, latency=0):
+    results = []
+    for size in sizes:
+        servers = Servers(size, os.path.join(root, 'hosts-{}'.format(size)), latency=latency)
+        try:
+            stack = BenchStack('bench-{}'.format(size), servers.names)
+            results.append(measure('stack.setup', stack.setup, size=size, latency=latency))
+            # Every step is up to date the second time
+            results.append(measure('stack.setup.warm', stack.setup, size=size, latency=latency))
+        finally:
+            servers.close()
+    return results
+
+def environment():
+    import botocore
+    try:
+        import moto
+        moto_version = moto.__version__
+    except ImportError:
+        moto_version = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'boto3': boto3.__version__,
+        'botocore': botocore.__version__, 'moto': moto_version, 'asyncssh': asyncssh.__version__}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark stack bring-up against moto and in-process SSH stand-ins')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Cluster sizes')
+    parser.add_argument('--stacks', type=int, nargs='+', default=STACKS, help='Numbers of stacks stored in the session')
+    parser.add_argument('--latency', type=float, default=0, help='Latency of each remote command, in seconds')
+    parser.add_argument('--only', nargs='+', default=('aws', 'session', 'setup'), choices=('aws', 'session', 'setup'))
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    output = os.path.abspath(args.output)
+    # Never touch real AWS resources, nor the session, caches and controller files of the current directory and home
+    for key in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ[key] = 'testing'
+    os.environ.pop('AWS_PROFILE', None)
+    root = tempfile.mkdtemp(prefix='venom-bench-')
+    os.environ['HOME'] = root
+    os.chdir(root)
+    try:
+        results = []
+        if 'aws' in args.only:
+            results += aws(args.sizes)
+        if 'session' in args.only:
+            results += session(args.stacks)
+        if 'setup' in args.only:
+            results += setup(args.sizes, root, args.latency)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    with open(output, 'w') as file:
+        json.dump({'format': FORMAT, 'environment': environment(), 'results': results}, file, sort_keys=True, indent=2, separators=(',', ': '))
+        file.write('\n')
+    logging.warning("{} results written to {}".format(len(results), output))
@@ -0,0 +1,59 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# Default time to live of cached metadata, in seconds
+TTL = 7*24*3600
+
+# A small persistent key value store with expiration, kept next to the session file
+class Cache(object):
+    def __init__(self, path=None, ttl=TTL):
+        self.path = path or 'cache.json'
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = None
+
+    def __load__(self):
+        if self.data is None:
+            try:
+                with open(self.path, 'r') as file:
+                    self.data = json.load(file)
+            except (IOError, ValueError) as e:
+                logging.info(e)
+                self.data = {}
+        return self.data
+
+    def __dump__(self):
+        # Write atomically so that concurrent readers never see a partial file
+        temporary = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temporary, 'w') as file:
+            json.dump(self.data, file, sort_keys=True, indent=2, separators=(',', ': '))
+        os.replace(temporary, self.path)
+
+    @staticmethod
+    def key(*parts):
+        return '/'.join(str(part) for part in parts)
+
+    def get(self, key, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            entry = self.__load__().get(key)
+        if entry and time.time() - entry['time'] < ttl:
+            return entry['value']
+        return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.__load__()[key] = {'time': time.time(), 'value': value}
+            self.__dump__()
+        return value
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.data = {}
+            else:
+                self.__load__().pop(key, None)
+            self.__dump__()
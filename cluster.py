@@ -2,112 +2,207 @@ from os.path import expanduser
 import json
 import logging
 import random
+import time
+import threading
 from termcolor import colored
-import boto3
+from botocore.exceptions import ClientError
 from session import Item
+from pool import get_session, get_resource
+from cache import Cache
+from tracing import ThreadPoolExecutor, traced, span, record, tags
+
+# Instance states that cannot lead to a running instance
+FINAL_STATES = ('shutting-down', 'terminated')
+# Instance states of the active and of the parked (warm pool) instances
+RUNNING_STATES = ('pending', 'running')
+PARKED_STATES = ('stopping', 'stopped')
+# Launch errors meaning this instance type or market has no capacity for us right now
+CAPACITY_ERRORS = ('InsufficientInstanceCapacity', 'InsufficientCapacity', 'InstanceLimitExceeded', 'VcpuLimitExceeded',
+    'SpotMaxPriceTooLow', 'MaxSpotInstanceCountExceeded', 'Unsupported')
+# Lazy fields resolved by Cluster.load
+FIELDS = ('key', 'security_group', 'instances', 'subnet', 'vpc', 'image')
+# Fields loaded along with another one
+DEPENDENCIES = {'hosts': ('instances',), 'vpc': ('subnet',)}
 
 class Cluster(Item):
+    __lazy__ = FIELDS + ('hosts',)
     # SSH key
     ssh_key_path = expanduser('~/.ssh/id_rsa.pub')
     image_name = 'Deep Learning AMI (Ubuntu) Version 7.0'
     instance_user = 'ubuntu'#'ec2-user, ubuntu'
+    # AMI, subnet and VPC lookups cache
+    cache = Cache()
     # instance_type in  ['p3.2xlarge', 'p3.8xlarge', 'p3.16xlarge', 'p2.xlarge', 'p2.8xlarge', 'p2.16xlarge', 'm5.large']
-    def __init__(self, id='venom', size=3, profile_name='default', region_name='eu-west-1', subnet_id=None, image_id=None, instance_type='p2.xlarge', instance_role='EMR_EC2_DefaultRole', tags=(), ip_mask='0.0.0.0/0'):
+    def __init__(self, id='venom', size=3, profile_name='default', region_name='eu-west-1', subnet_id=None, image_id=None, instance_type='p2.xlarge', instance_role='EMR_EC2_DefaultRole', tags=(), ip_mask='0.0.0.0/0', warm=0, instance_types=None, markets=('on-demand',), subnet_ids=None, placement=None, placement_strategy=None):
         self.id = id
         self.size = size
+        # Number of stopped instances kept ready to be started
+        self.warm = warm
         self.profile_name = profile_name
         self.region_name = region_name
         self.subnet_id = subnet_id
+        # Subnets instances are spread over, defaults to the cluster subnet
+        self.subnet_ids = list(subnet_ids or [])
+        if self.subnet_ids and not self.subnet_id:
+            self.subnet_id = self.subnet_ids[0]
+        # Subnet and availability zone of each instance
+        self.placement = dict(placement or {})
+        # Placement group strategy ('cluster', 'spread' or 'partition'), None to launch without placement group
+        self.placement_strategy = placement_strategy
+        self.placement_group_name = self.id+'-pg'
         self.image_id = image_id
         self.instance_type = instance_type
+        # Instance types and markets ('spot', 'on-demand') to try in order when launching
+        self.instance_types = list(instance_types or [instance_type])
+        self.markets = list(markets)
         self.instance_role = instance_role
         self.tags = list(tags)
         self.object_tags = self.tags + [{'Key': 'Id','Value': self.id}]
         self.ip_mask = ip_mask
-        self.aws = boto3.session.Session(profile_name=self.profile_name, region_name=self.region_name)
-        self.ec2 = self.aws.resource('ec2')
-        self.subnet = None
-        self.vpc = None
-        self.image = None
         self.key_name = self.id+'-key'
-        self.key = None
         self.security_group_name = self.id+'-sg'
-        self.security_group = None
         self.instance_name = self.id+'-instance'
         self.instance_tags = self.object_tags + [{
             'Key': 'Name',
             'Value': self.instance_name
         }]
-        self.instances = None
-        # Load lazy fields
-        self.load()
+        # Background launches of the capacity missing at creation
+        self.lock = threading.Lock()
+        self.filling = threading.Event()
+        self.filler = None
+        # AWS handles and lazy fields (see FIELDS) are only resolved on first access
+
+    @property
+    def aws(self):
+        return get_session(self.profile_name, self.region_name)
+
+    @property
+    def ec2(self):
+        return get_resource('ec2', self.profile_name, self.region_name)
 
-    def load(self, force=False):
+    @traced('cluster.load')
+    def load(self, force=False, fields=FIELDS):
+        # Only resolve the requested fields, hosts come with instances and the VPC with the subnet
+        fields = set(fields)
+        for field in list(fields):
+            fields.update(DEPENDENCIES.get(field, ()))
+        fields.discard('hosts')
+        # Image and subnet lookups are slow and stable, resolve them from the metadata cache when possible
+        image_key = Cache.key('image', self.profile_name, self.region_name, self.image_name)
+        subnet_key = Cache.key('subnet', self.profile_name, self.region_name, self.security_group_name)
         if force:
-            self.subnet = None
-            self.vpc = None
-            self.image = None
-            self.key = None
-            self.security_group = None
-            self.instances = None
+            for field in fields:
+                setattr(self, field, None)
+            # Resolve again ids that came from the cache
+            if 'image' in fields:
+                if self.image_id == self.cache.get(image_key):
+                    self.image_id = None
+                self.cache.invalidate(image_key)
+            if 'subnet' in fields:
+                if self.subnet_id == self.cache.get(subnet_key):
+                    self.subnet_id = None
+                self.cache.invalidate(subnet_key)
+        # Fields already in the instance dict are loaded, do not go through lazy attribute access here
+        loaded = self.__dict__
+        if 'image' in fields and not self.image_id:
+            self.image_id = self.cache.get(image_key)
+        if 'subnet' in fields and not self.subnet_id:
+            self.subnet_id = self.cache.get(subnet_key)
+        client = self.ec2.meta.client
+        # Issue the independent lookups concurrently, boto3 clients are thread safe
+        with ThreadPoolExecutor(max_workers=len(FIELDS)) as executor:
+            if 'key' in fields and not loaded.get('key'):
+                key = executor.submit(client.describe_key_pairs, Filters=[{'Name':'key-name', 'Values':[self.key_name]}])
+            else:
+                key = None
+            if not loaded.get('security_group') and ('security_group' in fields or ('subnet' in fields and not loaded.get('subnet') and not self.subnet_id)):
+                security_group = executor.submit(client.describe_security_groups, Filters=[{'Name':'group-name', 'Values':[self.security_group_name]}])
+            else:
+                security_group = None
+            if 'instances' in fields and not loaded.get('instances'):
+                # Filter on the security group name so that we do not have to wait for the group lookup
+                instances = executor.submit(self.describe_instances,
+                    Filters=[{'Name':'tag:Name', 'Values':[self.instance_name]},
+                        {'Name':'instance-state-name', 'Values':['pending', 'running', 'stopping', 'stopped']},
+                        {'Name':'instance.group-name', 'Values':[self.security_group_name]}])
+            else:
+                instances = None
+            if 'subnet' in fields and not loaded.get('subnet') and not self.subnet_id:
+                subnets = executor.submit(client.describe_subnets)
+            else:
+                subnets = None
+            if 'image' in fields and not loaded.get('image') and not self.image_id:
+                images = executor.submit(client.describe_images, Filters=[{'Name':'name', 'Values':[self.image_name]}])
+            else:
+                images = None
         # Load key-pair
-        if not self.key:
+        if key:
             try:
-                self.key = random.choice(list(self.ec2.key_pairs.filter(Filters=[{'Name':'key-name', 'Values':[self.key_name]}])))
+                self.key = self.resource('KeyPair', random.choice(key.result()['KeyPairs']), 'KeyName')
                 logging.info("{} found".format(self.key_name))
             except Exception as e:
                 self.key = None
                 logging.info(e)
         # Load security group
-        if not self.security_group:
+        if security_group:
             try:
-                self.security_group = random.choice(list(self.ec2.security_groups.filter(Filters=[{'Name':'group-name', 'Values':[self.security_group_name]}])))
+                self.security_group = self.resource('SecurityGroup', random.choice(security_group.result()['SecurityGroups']), 'GroupId')
                 logging.info("{} found".format(self.security_group_name))
             except Exception as e:
                 self.security_group = None
                 logging.info(e)
         # Load instances
-        if not self.instances:
-            if self.security_group:
-                self.instances = list(self.ec2.instances.filter(
-                    Filters=[{'Name':'tag:Name', 'Values':[self.instance_name]},
-                        {'Name':'instance-state-name', 'Values':['pending', 'running', 'stopping', 'stopped']},
-                        {'Name':'instance.group-id', 'Values':[self.security_group.group_id]}]
-                ))
-            else:
-                self.instances = []
-            self.hosts = [instance.public_dns_name or instance.private_dns_name for instance in self.instances]
+        if instances:
+            self.instances = instances.result()
+            self.placement = {}
+            self.place(self.instances)
+            self.hosts = self.get_hosts()
             logging.info("{} instances found".format(self.hosts))
         # Load subnet
-        if not self.subnet:
+        if 'subnet' in fields and not loaded.get('subnet'):
             if self.subnet_id:
                 self.subnet = self.ec2.Subnet(self.subnet_id)
-            elif self.security_group:
-                self.subnet = random.choice(list(self.ec2.subnets.filter(
-                    Filters=[{'Name':'vpc-id', 'Values':[self.security_group.vpc_id]}]
-                )))
-                self.subnet_id = self.subnet.id
-                logging.info("{} found".format(self.subnet_id))
             else:
-                self.subnet = random.choice(list(self.ec2.subnets.all()))
-                self.subnet_id = self.subnet.id
+                candidates = subnets.result()['Subnets']
+                if loaded.get('security_group'):
+                    candidates = [subnet for subnet in candidates if subnet['VpcId'] == self.security_group.vpc_id]
+                # Always pick the same subnet
+                self.subnet = self.resource('Subnet', min(candidates, key=lambda subnet: subnet['SubnetId']), 'SubnetId')
+                self.subnet_id = self.cache.set(subnet_key, self.subnet.id)
+                logging.info("{} found".format(self.subnet_id))
         # Load VPC
-        if not self.vpc:
-            self.vpc = self.subnet.vpc
+        if 'vpc' in fields and not loaded.get('vpc'):
+            vpc_key = Cache.key('vpc', self.profile_name, self.region_name, self.subnet_id)
+            if force:
+                self.cache.invalidate(vpc_key)
+            self.vpc = self.ec2.Vpc(self.cache.get(vpc_key) or self.cache.set(vpc_key, self.subnet.vpc_id))
         # Load disk image
-        if not self.image:
+        if 'image' in fields and not loaded.get('image'):
             if self.image_id:
                 self.image = self.ec2.Image(self.image_id)
             else:
-                self.image = random.choice(list(self.ec2.images.filter(
-                    Filters=[{'Name':'name', 'Values':[self.image_name]}]
-                )))
-                self.image_id = self.image.id
+                self.image = self.resource('Image', random.choice(images.result()['Images']), 'ImageId')
+                self.image_id = self.cache.set(image_key, self.image.id)
                 logging.info("{} found".format(self.image.name))
         return self
 
-    def create(self):
+    def resource(self, name, data, identifier):
+        # Build a resource from a describe response, without reloading it
+        result = getattr(self.ec2, name)(data[identifier])
+        result.meta.data = data
+        return result
+
+    def describe_instances(self, **kwargs):
+        return [self.resource('Instance', data, 'InstanceId')
+            for page in self.ec2.meta.client.get_paginator('describe_instances').paginate(**kwargs)
+            for reservation in page['Reservations']
+            for data in reservation['Instances']]
+
+    @traced('cluster.create')
+    def create(self, callback=None, late=None):
+        # late is called from a background thread with each instance launched after create returned
         logging.info("Create the cluster")
+        self.load()
         # Upload key pair if needed
         if not self.key:
             with open(self.ssh_key_path, 'r') as key_file:
@@ -144,64 +239,257 @@ class Cluster(Item):
             }
             self.security_group.authorize_ingress(IpPermissions=[all_in_group, ssh_all, services_all, icmp_all])
             logging.info(colored("{} created".format(self.security_group.group_name), 'green'))
+        # Create placement group if needed
+        if self.placement_strategy:
+            try:
+                self.ec2.meta.client.create_placement_group(GroupName=self.placement_group_name, Strategy=self.placement_strategy,
+                    TagSpecifications=[{'ResourceType': 'placement-group', 'Tags': self.object_tags}])
+                logging.info(colored("{} created".format(self.placement_group_name), 'green'))
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidPlacementGroup.Duplicate':
+                    raise
+                logging.info("{} found".format(self.placement_group_name))
         # Create instances if needed
-        logging.info("Instances already running: {}".format(self.instances))
-        if self.size>len(self.instances):
-            self.instances += self.ec2.create_instances(ImageId=self.image.id, InstanceType=self.instance_type,
-                KeyName=self.key_name, MinCount=self.size-len(self.instances), MaxCount=self.size-len(self.instances),
-                SecurityGroupIds=[self.security_group.group_id], SubnetId=self.subnet.id,
-                IamInstanceProfile={'Name': self.instance_role},
-                TagSpecifications=[{'ResourceType': 'instance', 'Tags': self.instance_tags}]
-            )
-            logging.info("Creating instances")
-            for instance in self.instances:
-                instance.wait_until_running()
-                instance.reload() # Reload lazyly loaded fields, for potential public_dns_name updates
-                logging.info(colored("{} created".format(instance.id), 'green'))
-            # Get the host list
-            self.hosts = [instance.public_dns_name or instance.private_dns_name for instance in self.instances]
+        logging.info("Instances already running: {}".format(self.running))
+        if self.size>len(self.running):
+            self.scale_up(self.size-len(self.running), callback=callback, late=late)
+            if self.placement_strategy:
+                self.enable_ena(callback=callback)
+        # Keep the warm pool filled
+        self.replenish()
         return self
 
-    def start(self):
+    @traced('cluster.start')
+    def start(self, callback=None):
         logging.info("Start the cluster")
-        # Destroy instances
-        if self.instances:
-            for instance in self.instances:
-                instance.start()
-            for instance in self.instances:
-                instance.wait_until_running()
-                instance.reload() # Reload lazyly loaded fields, for potential public_dns_name updates
-                logging.info(colored("{} started".format(instance.id), 'green'))
-            # Get the host list
-            self.hosts = [instance.public_dns_name or instance.private_dns_name for instance in self.instances]
+        self.load(fields=('instances',))
+        # Start parked instances, leaving the warm pool stopped
+        if self.size>len(self.running):
+            self.scale_up(self.size-len(self.running), callback=callback, launch=False)
         return self
 
-    def stop(self):
+    @property
+    def running(self):
+        return [instance for instance in self.instances if instance.state['Name'] in RUNNING_STATES]
+
+    @property
+    def parked(self):
+        return [instance for instance in self.instances if instance.state['Name'] in PARKED_STATES]
+
+    def get_hosts(self):
+        return [instance.public_dns_name or instance.private_dns_name for instance in self.running]
+
+    def launch(self, count, markets=None):
+        # Spread launches over the subnets concurrently, retrying what failed in the subnets that still have capacity
+        instances = []
+        candidates = list(self.subnet_ids or [self.subnet.id])
+        # A cluster placement group lives in a single availability zone
+        if self.placement_strategy == 'cluster':
+            candidates = [self.subnet.id]
+        while len(instances)<count and candidates:
+            missing = count-len(instances)
+            shares = [(subnet_id, missing//len(candidates)+(1 if index<missing%len(candidates) else 0))
+                for index, subnet_id in enumerate(candidates)]
+            with ThreadPoolExecutor(max_workers=len(shares)) as executor:
+                results = list(executor.map(lambda share: self.launch_in(share[0], share[1], markets), shares))
+            for (subnet_id, share), launched in zip(shares, results):
+                instances += launched
+                if len(launched)<share:
+                    candidates.remove(subnet_id)
+        with self.lock:
+            self.instances += instances
+        return instances
+
+    @traced('cluster.launch')
+    def launch_in(self, subnet_id, count, markets=None):
+        # Try each instance type and market in order, taking whatever capacity is available
+        instances = []
+        for instance_type in self.instance_types:
+            for market in markets or self.markets:
+                options = {}
+                if self.placement_strategy:
+                    options['Placement'] = {'GroupName': self.placement_group_name}
+                if market == 'spot':
+                    options['InstanceMarketOptions'] = {'MarketType': 'spot',
+                        'SpotOptions': {'SpotInstanceType': 'one-time', 'InstanceInterruptionBehavior': 'terminate'}}
+                # Partial fulfilment: ask for at least one instance until this option runs out of capacity
+                while len(instances)<count:
+                    logging.info("Launch {} {} {} instances in {}".format(count-len(instances), market, instance_type, subnet_id))
+                    try:
+                        response = self.ec2.meta.client.run_instances(ImageId=self.image.id, InstanceType=instance_type,
+                            KeyName=self.key_name, MinCount=1, MaxCount=count-len(instances),
+                            SecurityGroupIds=[self.security_group.group_id], SubnetId=subnet_id,
+                            IamInstanceProfile={'Name': self.instance_role},
+                            TagSpecifications=[{'ResourceType': 'instance', 'Tags': self.instance_tags}],
+                            **options
+                        )
+                    except ClientError as e:
+                        if e.response['Error']['Code'] not in CAPACITY_ERRORS:
+                            raise
+                        logging.info(colored(e, 'yellow'))
+                        break
+                    instances += [self.resource('Instance', data, 'InstanceId') for data in response['Instances']]
+        self.place(instances)
+        return instances
+
+    def place(self, instances):
+        # Record where instances landed
+        with self.lock:
+            for instance in instances:
+                self.placement[instance.id] = {'subnet_id': instance.meta.data.get('SubnetId'),
+                    'availability_zone': instance.meta.data.get('Placement', {}).get('AvailabilityZone')}
+        return self
+
+    @traced('cluster.scale_up')
+    def scale_up(self, count, callback=None, launch=True, late=None):
+        # Restart parked instances before launching new ones, they come up much faster
+        parked = self.parked[:count]
+        if parked:
+            logging.info("Start {} parked instances".format(len(parked)))
+            self.wait([instance for instance in parked if instance.state['Name'] == 'stopping'], 'stopped')
+            self.ec2.meta.client.start_instances(InstanceIds=[instance.id for instance in parked])
+        launched = self.launch(count-len(parked)) if launch and count>len(parked) else []
+        for instance in self.watch(parked+launched, 'running'):
+            logging.info(colored("{} {}".format(instance.id, 'started' if instance in parked else 'created'), 'green'))
+            if callback:
+                callback(instance)
+        # Get the host list
+        self.hosts = self.get_hosts()
+        # Launch what is missing in the background, hosts already up are usable
+        if launch and count>len(parked)+len(launched):
+            self.fill(count-len(parked)-len(launched), callback=callback, late=late)
+        return parked+launched
+
+    def fill(self, count, callback=None, interval=60, late=None):
+        def target():
+            missing = count
+            while missing>0 and not self.filling.wait(interval):
+                launched = self.launch(missing)
+                missing -= len(launched)
+                for instance in self.watch(launched, 'running'):
+                    logging.info(colored("{} created".format(instance.id), 'green'))
+                    if callback:
+                        callback(instance)
+                    if late:
+                        late(instance)
+                with self.lock:
+                    self.hosts = self.get_hosts()
+            logging.info("Background launches done, {} instances missing".format(missing))
+        logging.info(colored("{} instances missing, launching them in the background".format(count), 'yellow'))
+        self.filling.clear()
+        self.filler = threading.Thread(target=target, daemon=True)
+        self.filler.start()
+        return self.filler
+
+    def cancel(self):
+        # Stop background launches
+        if self.filler:
+            self.filling.set()
+            self.filler.join()
+            self.filler = None
+        return self
+
+    @traced('cluster.scale_down')
+    def scale_down(self, count):
+        # Remove the last running instances, the first one hosts the controller
+        instances = self.running[len(self.running)-count:]
+        # Park removed instances while the warm pool is under its floor, terminate the others
+        # Spot instances cannot be stopped
+        stoppable = [instance for instance in instances if instance.meta.data.get('InstanceLifecycle') != 'spot']
+        parked = stoppable[:max(0, self.warm-len(self.parked))]
+        terminated = [instance for instance in instances if instance not in parked]
+        if parked:
+            self.ec2.meta.client.stop_instances(InstanceIds=[instance.id for instance in parked])
+        if terminated:
+            self.ec2.meta.client.terminate_instances(InstanceIds=[instance.id for instance in terminated])
+        for instance in self.watch(parked, 'stopped'):
+            logging.info(colored("{} parked".format(instance.id), 'blue'))
+        for instance in self.watch(terminated, 'terminated'):
+            logging.info(colored("{} terminated".format(instance.id), 'red'))
+        self.instances = [instance for instance in self.instances if instance not in terminated]
+        for instance in terminated:
+            self.placement.pop(instance.id, None)
+        # Get the host list
+        self.hosts = self.get_hosts()
+        return instances
+
+    @traced('cluster.resize')
+    def resize(self, size, callback=None, late=None):
+        logging.info("Resize the cluster from {} to {}".format(self.size, size))
+        self.cancel()
+        self.load(force=True, fields=('instances',))
+        self.size = size
+        if self.size>len(self.running):
+            self.scale_up(self.size-len(self.running), callback=callback, late=late)
+            # Keep the warm pool filled
+            self.replenish()
+        elif self.size<len(self.running):
+            self.scale_down(len(self.running)-self.size)
+        return self
+
+    @traced('cluster.replenish')
+    def replenish(self):
+        # Launch and park instances until the warm pool has its floor of stopped instances
+        count = self.warm-len(self.parked)
+        if count>0:
+            instances = self.launch(count, markets=('on-demand',))
+            self.wait(instances, 'running')
+            self.ec2.meta.client.stop_instances(InstanceIds=[instance.id for instance in instances])
+            for instance in self.watch(instances, 'stopped'):
+                logging.info(colored("{} parked".format(instance.id), 'blue'))
+        return self
+
+    @traced('cluster.stop')
+    def stop(self, callback=None):
         logging.info("Stop the cluster")
-        # Destroy instances
-        if self.instances:
-            for instance in self.instances:
-                instance.stop()
-            for instance in self.instances:
-                instance.wait_until_stopped()
-                instance.reload() # Reload lazyly loaded fields, for potential public_dns_name updates
-                logging.info(colored("{} stopped".format(instance.id), 'red'))
-            # Get the host list
-            self.hosts = [instance.public_dns_name or instance.private_dns_name for instance in self.instances]
+        self.load(fields=('instances',))
+        # Stop instances, spot instances cannot be stopped and EC2 would reject the whole call, terminate them
+        stopped = [instance for instance in self.instances if instance.meta.data.get('InstanceLifecycle') != 'spot']
+        terminated = [instance for instance in self.instances if instance not in stopped]
+        if stopped:
+            self.ec2.meta.client.stop_instances(InstanceIds=[instance.id for instance in stopped])
+        if terminated:
+            logging.info(colored("Terminate the spot instances {}".format([instance.id for instance in terminated]), 'yellow'))
+            self.ec2.meta.client.terminate_instances(InstanceIds=[instance.id for instance in terminated])
+        for instance in self.watch(stopped, 'stopped'):
+            logging.info(colored("{} stopped".format(instance.id), 'red'))
+            if callback:
+                callback(instance)
+        for instance in self.watch(terminated, 'terminated'):
+            logging.info(colored("{} terminated".format(instance.id), 'red'))
+            if callback:
+                callback(instance)
+        if terminated:
+            self.instances = stopped
+            for instance in terminated:
+                self.placement.pop(instance.id, None)
+        # Get the host list
+        self.hosts = self.get_hosts()
         return self
 
-    def terminate(self):
+    @traced('cluster.terminate')
+    def terminate(self, callback=None):
         logging.info("Destroy the cluster")
+        self.cancel()
+        self.load(fields=('instances', 'security_group', 'key'))
         # Destroy instances
         if self.instances:
-            for instance in self.instances:
-                instance.terminate()
-            for instance in self.instances:
-                instance.wait_until_terminated()
-                instance.reload() # Reload lazyly loaded fields, for potential public_dns_name updates
+            self.ec2.meta.client.terminate_instances(InstanceIds=[instance.id for instance in self.instances])
+            for instance in self.watch(self.instances, 'terminated'):
                 logging.info(colored("{} terminated".format(instance.id), 'red'))
+                if callback:
+                    callback(instance)
+            self.placement = {}
             # Get the host list
-            self.hosts = [instance.public_dns_name or instance.private_dns_name for instance in self.instances]
+            self.hosts = self.get_hosts()
+        # Destroy placement group
+        if self.placement_strategy:
+            try:
+                self.ec2.meta.client.delete_placement_group(GroupName=self.placement_group_name)
+                logging.info(colored("{} destroyed".format(self.placement_group_name), 'red'))
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidPlacementGroup.Unknown':
+                    raise
         # Destroy secirity group
         if self.security_group:
             self.security_group.delete()
@@ -214,15 +502,111 @@ class Cluster(Item):
             logging.info(colored("{} destroyed".format(self.key_name), 'red'))
         return self
 
+    @traced('cluster.enable_ena')
+    def enable_ena(self, callback=None):
+        # Enable enhanced networking on running instances whose type supports it, they have to be stopped for that
+        types = self.ec2.meta.client.describe_instance_types(InstanceTypes=list(set(instance.instance_type for instance in self.running)))
+        supported = set(info['InstanceType'] for info in types['InstanceTypes'] if info['NetworkInfo']['EnaSupport'] in ('supported', 'required'))
+        instances = [instance for instance in self.running
+            if instance.instance_type in supported and not instance.meta.data.get('EnaSupport')
+            and instance.meta.data.get('InstanceLifecycle') != 'spot']
+        # Without the ena driver in the image, the instances would not come back on the network
+        images = set(instance.image_id for instance in instances)
+        images = set(image['ImageId'] for image in self.ec2.meta.client.describe_images(ImageIds=list(images))['Images']
+            if image.get('EnaSupport')) if images else set()
+        skipped = [instance.id for instance in instances if instance.image_id not in images]
+        if skipped:
+            logging.warning(colored("Do not enable ENA on {}, their image does not support it".format(skipped), 'yellow'))
+        instances = [instance for instance in instances if instance.image_id in images]
+        if instances:
+            logging.info("Enable ENA on {}".format([instance.id for instance in instances]))
+            self.ec2.meta.client.stop_instances(InstanceIds=[instance.id for instance in instances])
+            for instance in self.watch(instances, 'stopped'):
+                self.ec2.meta.client.modify_instance_attribute(InstanceId=instance.id, EnaSupport={'Value': True})
+            self.ec2.meta.client.start_instances(InstanceIds=[instance.id for instance in instances])
+            for instance in self.watch(instances, 'running'):
+                logging.info(colored("{} has ENA".format(instance.id), 'green'))
+                if callback:
+                    callback(instance)
+            # Get the host list
+            self.hosts = self.get_hosts()
+        return self
+
+    @traced('cluster.bake')
+    def bake(self, instance=None, name=None):
+        # Snapshot a provisioned instance into an image that new instances are launched from
+        self.load(fields=('instances',))
+        instance = instance or self.instances[-1]
+        name = name or '{}-{}'.format(self.id, time.strftime('%Y%m%d%H%M%S'))
+        logging.info("Bake {} into {}".format(instance.id, name))
+        # Do not reboot, the cluster keeps running
+        image = instance.create_image(Name=name, Description='Venom provisioned image', NoReboot=True)
+        with span('cluster.wait:available', image=image.id):
+            self.ec2.meta.client.get_waiter('image_available').wait(ImageIds=[image.id])
+        image.create_tags(Tags=self.object_tags + [{'Key': 'Name', 'Value': name}])
+        self.image_id = image.id
+        self.image = image
+        logging.info(colored("{} baked".format(image.id), 'green'))
+        return image
+
+    def watch(self, instances, state, interval=1, max_interval=15, timeout=900):
+        # Track all instances with one describe_instances call per poll and yield each one as soon as it reaches state
+        pending = {instance.id: instance for instance in instances}
+        start = time.time()
+        deadline = start + timeout
+        delay = interval
+        while pending:
+            ready = []
+            try:
+                for page in self.ec2.meta.client.get_paginator('describe_instances').paginate(InstanceIds=list(pending)):
+                    for reservation in page['Reservations']:
+                        for data in reservation['Instances']:
+                            instance = pending.get(data['InstanceId'])
+                            if instance is None:
+                                continue
+                            current = data['State']['Name']
+                            if current == state:
+                                instance.meta.data = data # Refresh lazyly loaded fields, for potential public_dns_name updates
+                                ready.append(pending.pop(instance.id))
+                            elif current in FINAL_STATES and state not in FINAL_STATES:
+                                raise Exception("{} is {} while waiting for {}".format(instance.id, current, state))
+            except ClientError as e:
+                # Freshly launched instances may not be visible yet
+                if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                    raise
+            for instance in ready:
+                # One span per instance, from the start of the watch to the state change
+                record('cluster.wait:{}'.format(state), start, time.time(), dict(tags.get(), instance=instance.id,
+                    host=instance.meta.data.get('PublicDnsName') or instance.meta.data.get('PrivateDnsName') or instance.id))
+                yield instance
+            if not pending:
+                break
+            if time.time() > deadline:
+                raise TimeoutError("{} did not reach {} state".format(list(pending), state))
+            # Poll fast while instances keep settling, back off when nothing changes
+            delay = interval if ready else min(2*delay, max_interval)
+            time.sleep(min(delay, max(0, deadline - time.time())))
+
+    def wait(self, instances, state, callback=None):
+        result = []
+        for instance in self.watch(instances, state):
+            if callback:
+                callback(instance)
+            result.append(instance)
+        return result
+
     def __freeze__(self):
         result = super().__freeze__()
         result.update({'id':self.id, 'size':self.size, 'profile_name':self.profile_name, 'region_name':self.region_name,
             'subnet_id':self.subnet_id, 'image_id':self.image_id, 'instance_type':self.instance_type, 'instance_role':self.instance_role,
-            'tags':self.tags, 'ip_mask':self.ip_mask})
+            'tags':self.tags, 'ip_mask':self.ip_mask, 'warm':self.warm, 'instance_types':self.instance_types, 'markets':self.markets,
+            'subnet_ids':self.subnet_ids, 'placement':self.placement, 'placement_strategy':self.placement_strategy})
         return result
 
     @staticmethod
     def __unfreeze__(obj):
         return Cluster(id=obj['id'], size=obj['size'], profile_name=obj['profile_name'], region_name=obj['region_name'],
         subnet_id=obj['subnet_id'], image_id=obj['image_id'], instance_type=obj['instance_type'], instance_role=obj['instance_role'],
-        tags=obj['tags'], ip_mask=obj['ip_mask'])
+        tags=obj['tags'], ip_mask=obj['ip_mask'], warm=obj.get('warm', 0),
+        instance_types=obj.get('instance_types'), markets=obj.get('markets', ('on-demand',)),
+        subnet_ids=obj.get('subnet_ids'), placement=obj.get('placement'), placement_strategy=obj.get('placement_strategy'))
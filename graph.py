@@ -0,0 +1,79 @@
+import time
+import asyncio
+import logging
+from termcolor import colored
+from tracing import span
+
+# A provisioning step, run as soon as all its dependencies are done
+class Task(object):
+    def __init__(self, name, action, dependencies=(), host=None):
+        self.name = name
+        self.action = action
+        self.dependencies = list(dependencies)
+        self.host = host
+        self.start = None
+        self.end = None
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.end is not None else None
+
+    def __repr__(self):
+        return "Task({})".format(self.name)
+
+# A graph of coroutine tasks, replacing phase barriers so that each host moves on as soon as it can
+class Graph(object):
+    def __init__(self):
+        self.tasks = {}
+        self.start = None
+
+    def add(self, name, action, dependencies=(), host=None):
+        for dependency in dependencies:
+            if dependency not in self.tasks:
+                raise KeyError("Unknown dependency {} of {}".format(dependency, name))
+        self.tasks[name] = Task(name, action, dependencies, host)
+        return name
+
+    async def execute(self, task, futures):
+        await asyncio.gather(*[futures[dependency] for dependency in task.dependencies])
+        task.start = time.time()
+        # Spans of the task actions are tagged with its host
+        with span('task.{}'.format(task.name.split(':')[0]), task=task.name, host=task.host):
+            await task.action()
+        task.end = time.time()
+        logging.info(colored("{} done in {:.1f}s".format(task.name, task.duration), 'green'))
+
+    async def run(self):
+        self.start = time.time()
+        futures = {}
+        # Tasks are added after their dependencies, so insertion order is a topological order
+        for name, task in self.tasks.items():
+            futures[name] = asyncio.ensure_future(self.execute(task, futures))
+        try:
+            await asyncio.gather(*futures.values())
+        except:
+            for future in futures.values():
+                future.cancel()
+            raise
+        self.report()
+        return self
+
+    def critical_path(self):
+        # Walk back from the last task to finish, through the dependency that finished last
+        done = [task for task in self.tasks.values() if task.end is not None]
+        if not done:
+            return []
+        task = max(done, key=lambda task: task.end)
+        path = [task]
+        while task.dependencies:
+            task = max((self.tasks[dependency] for dependency in task.dependencies), key=lambda task: task.end)
+            path.append(task)
+        return path[::-1]
+
+    def report(self):
+        path = self.critical_path()
+        if path:
+            logging.info(colored("Critical path ({:.1f}s):".format(path[-1].end - self.start), 'yellow'))
+            for task in path:
+                logging.info(colored("  {} +{:.1f}s {:.1f}s".format(task.name, task.start - self.start, task.duration), 'yellow'))
+        return path
@@ -0,0 +1,195 @@
+import os
+import time
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from botocore.exceptions import ClientError
+from pool import get_client
+
+# Content-addressed memoization for the client and the engines: results are keyed by the function code and
+# the pickled arguments, kept in an in-memory LRU, optionally in a disk LRU, and in the Store bucket which outlives clusters
+
+def digest(code, sha256):
+    # The code objects of a function are hashed rather than its source, which engines do not have
+    sha256.update(code.co_code)
+    sha256.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode())
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            digest(const, sha256)
+        else:
+            sha256.update(repr(const).encode())
+
+def function_digest(function, sha256, seen=None):
+    # The code, the default arguments and the values captured by the closure all change the results
+    sha256.update('{}.{}'.format(function.__module__, function.__qualname__).encode())
+    # A recursive nested function has itself in its closure
+    seen = set() if seen is None else seen
+    if id(function) in seen:
+        return
+    seen.add(id(function))
+    digest(function.__code__, sha256)
+    values = [function.__defaults__, sorted((function.__kwdefaults__ or {}).items())]
+    for cell in function.__closure__ or ():
+        try:
+            values.append(cell.cell_contents)
+        except ValueError:
+            # Not assigned yet
+            values.append(None)
+    for value in values:
+        if hasattr(value, '__code__'):
+            function_digest(value, sha256, seen)
+        else:
+            sha256.update(value_digest(value))
+
+def value_digest(value):
+    # Values that cannot be pickled (locks, clients, open files) do not hold results, only their type is hashed
+    try:
+        return pickle.dumps(value, protocol=4)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return '<{}.{}>'.format(type(value).__module__, type(value).__qualname__).encode()
+
+class Memo(object):
+    def __init__(self, bucket, prefix='memo/', profile_name=None, region_name=None, engine_profile_name=None, size=256, path=None, disk_size=10<<30):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.profile_name = profile_name
+        self.region_name = region_name
+        # Profile to use once shipped to the engines, None for their instance role
+        self.engine_profile_name = engine_profile_name
+        self.size = size
+        self.path = path and os.path.expanduser(path)
+        self.disk_size = disk_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0, 's3': 0, 'miss': 0}
+
+    def __getstate__(self):
+        # Ship the configuration, not the cached results
+        state = dict(self.__dict__, profile_name=self.engine_profile_name, entries=OrderedDict(), hits=dict.fromkeys(self.hits, 0))
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @property
+    def s3(self):
+        return get_client('s3', self.profile_name, self.region_name)
+
+    def key(self, function, args=(), kwargs={}):
+        sha256 = hashlib.sha256()
+        function_digest(function, sha256)
+        sha256.update(pickle.dumps((args, sorted(kwargs.items())), protocol=4))
+        return sha256.hexdigest()
+
+    def get(self, key):
+        # (True, value) from the first tier that has it, filling the faster tiers, or (False, None)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits['memory'] += 1
+                return True, self.entries[key]
+        data = self.read(key)
+        if data is not None:
+            self.hits['disk'] += 1
+        else:
+            try:
+                data = self.s3.get_object(Bucket=self.bucket, Key=self.prefix+key)['Body'].read()
+            except ClientError as e:
+                if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                    raise
+                self.hits['miss'] += 1
+                return False, None
+            self.hits['s3'] += 1
+            self.write(key, data)
+        value = pickle.loads(data)
+        self.remember(key, value)
+        return True, value
+
+    def set(self, key, value):
+        data = pickle.dumps(value, protocol=4)
+        self.s3.put_object(Bucket=self.bucket, Key=self.prefix+key, Body=data)
+        self.write(key, data)
+        self.remember(key, value)
+        return value
+
+    def remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def read(self, key):
+        if not self.path:
+            return None
+        try:
+            with open(os.path.join(self.path, key), 'rb') as file:
+                data = file.read()
+        except IOError:
+            return None
+        # Recently used entries are evicted last
+        os.utime(os.path.join(self.path, key))
+        return data
+
+    def write(self, key, data):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        temporary = os.path.join(self.path, '{}.{}.tmp'.format(key, os.getpid()))
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, os.path.join(self.path, key))
+        self.prune()
+
+    def prune(self):
+        # Evict the least recently used files beyond disk_size bytes
+        files = []
+        for name in os.listdir(self.path):
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for mtime, size, name in files)
+        for mtime, size, name in sorted(files):
+            if total <= self.disk_size:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self, remote=False):
+        # Forget local results, and the stored ones with remote=True
+        with self.lock:
+            self.entries.clear()
+        if self.path and os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                os.remove(os.path.join(self.path, name))
+        if remote:
+            for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix):
+                objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+                if objects:
+                    self.s3.delete_objects(Bucket=self.bucket, Delete={'Objects': objects})
+        return self
+
+    def __call__(self, function):
+        # Decorate a function, e.g. view.map(memo(f), items)
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = self.key(function, args, kwargs)
+            found, value = self.get(key)
+            if found:
+                return value
+            start = time.time()
+            value = function(*args, **kwargs)
+            logging.debug("{} computed in {:.1f}s".format(key, time.time()-start))
+            return self.set(key, value)
+        wrapper.memo = self
+        return wrapper
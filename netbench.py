@@ -0,0 +1,98 @@
+import logging
+from termcolor import colored
+import ipyparallel as ipp
+
+# Engine to engine network benchmark, the functions below run on the engines
+
+@ipp.interactive
+def serve():
+    # Start a background TCP server echoing small messages ('e') or draining bulk data ('b')
+    import socket
+    import threading
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('0.0.0.0', 0))
+    server.listen(16)
+    def handle(connection):
+        with connection:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            mode = connection.recv(1)
+            while True:
+                data = connection.recv(1<<20)
+                if not data:
+                    break
+                if mode == b'e':
+                    connection.sendall(data)
+            if mode == b'b':
+                connection.sendall(b'k')
+    def accept():
+        while True:
+            try:
+                connection, address = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+    threading.Thread(target=accept, daemon=True).start()
+    globals()['venom_netbench_server'] = server
+    hostname = socket.gethostname()
+    return hostname, socket.gethostbyname(hostname), server.getsockname()[1]
+
+@ipp.interactive
+def stop():
+    server = globals().pop('venom_netbench_server', None)
+    if server:
+        server.close()
+
+@ipp.interactive
+def probe(address, port, count=1000, size=256<<20):
+    # Measure the round trip time of small messages and the bandwidth of a bulk transfer
+    import socket
+    import time
+    message = b'x'*64
+    with socket.create_connection((address, port)) as connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection.sendall(b'e')
+        start = time.perf_counter()
+        for i in range(count):
+            connection.sendall(message)
+            received = 0
+            while received < len(message):
+                received += len(connection.recv(len(message)-received))
+        rtt = (time.perf_counter()-start)/count
+    chunk = bytes(1<<20)
+    with socket.create_connection((address, port)) as connection:
+        connection.sendall(b'b')
+        start = time.perf_counter()
+        sent = 0
+        while sent < size:
+            connection.sendall(chunk)
+            sent += len(chunk)
+        connection.shutdown(socket.SHUT_WR)
+        connection.recv(1)
+        bandwidth = sent/(time.perf_counter()-start)
+    return rtt, bandwidth
+
+def benchmark(client=None, count=1000, size=256<<20):
+    # Each engine probes the next one in a ring, preferring pairs on different hosts
+    client = client or ipp.Client()
+    view = client[:]
+    endpoints = dict(zip(client.ids, view.apply_sync(serve)))
+    try:
+        engines = sorted(endpoints, key=lambda engine: (endpoints[engine][0], engine))
+        # Interleave hosts so that neighbours in the ring are on different hosts when possible
+        hosts = {}
+        for engine in engines:
+            hosts.setdefault(endpoints[engine][0], []).append(engine)
+        ring = [engine for group in zip(*hosts.values()) for engine in group]
+        ring += [engine for engine in engines if engine not in ring]
+        pairs = list(zip(ring, ring[1:]+ring[:1])) if len(ring)>1 else []
+        results = [client[source].apply_async(probe, endpoints[target][1], endpoints[target][2], count, size)
+            for source, target in pairs]
+        report = []
+        for (source, target), result in zip(pairs, results):
+            rtt, bandwidth = result.get()
+            report.append({'source': endpoints[source][0], 'target': endpoints[target][0], 'rtt': rtt, 'bandwidth': bandwidth})
+            logging.info(colored("{} -> {}: rtt {:.1f}us, bandwidth {:.2f}Gbit/s".format(
+                endpoints[source][0], endpoints[target][0], rtt*1e6, bandwidth*8/1e9), 'yellow'))
+        return report
+    finally:
+        view.apply_sync(stop)
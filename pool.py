@@ -0,0 +1,52 @@
+import threading
+import logging
+import boto3
+from botocore.config import Config
+from tracing import instrument
+
+# Process wide boto3 sessions, resources and clients, shared by every Store and Cluster
+# Enough connections for concurrent discovery, waiters and transfers on a shared client
+MAX_POOL_CONNECTIONS = 64
+CONFIG = Config(max_pool_connections=MAX_POOL_CONNECTIONS, retries={'max_attempts': 10, 'mode': 'standard'})
+
+lock = threading.RLock()
+sessions = {}
+resources = {}
+clients = {}
+
+def get_session(profile_name=None, region_name=None):
+    key = (profile_name, region_name)
+    with lock:
+        if key not in sessions:
+            logging.info("Open AWS session for {}".format(key))
+            sessions[key] = boto3.session.Session(profile_name=profile_name, region_name=region_name)
+            # Time every API call made through the session
+            instrument(sessions[key].events)
+        return sessions[key]
+
+def get_resource(service, profile_name=None, region_name=None):
+    # Resources are not thread safe, use their client (meta.client) from worker threads
+    key = (profile_name, region_name, service)
+    with lock:
+        if key not in resources:
+            resources[key] = get_session(profile_name, region_name).resource(service, config=CONFIG)
+            # The resource client and the shared client are the same, so they share connections
+            clients[key] = resources[key].meta.client
+        return resources[key]
+
+def get_client(service, profile_name=None, region_name=None):
+    key = (profile_name, region_name, service)
+    with lock:
+        if key not in clients:
+            aws = get_session(profile_name, region_name)
+            if service in aws.get_available_resources():
+                get_resource(service, profile_name, region_name)
+            else:
+                clients[key] = aws.client(service, config=CONFIG)
+        return clients[key]
+
+def clear():
+    with lock:
+        sessions.clear()
+        resources.clear()
+        clients.clear()
@@ -0,0 +1,49 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import asyncssh
+from tracing import span
+
+# Default per host deadline of a readiness probe, in seconds
+DEADLINE = 900
+# Backoff bounds, the maximum keeps a ready host from waiting more than about a second
+INITIAL_DELAY = 0.1
+MAXIMUM_DELAY = 1
+
+async def backoff(check, deadline=DEADLINE, message="Waiting", initial=INITIAL_DELAY, maximum=MAXIMUM_DELAY):
+    # Retry check with exponential backoff and full jitter until it returns a true value or the deadline passes
+    start = time.time()
+    delay = initial
+    error = None
+    logging.info(message)
+    with span('probe', message=message):
+        while True:
+            try:
+                result = await check()
+                if result:
+                    return result
+            except (OSError, asyncssh.Error, asyncio.TimeoutError) as e:
+                error = e
+            remaining = deadline-(time.time()-start)
+            if remaining <= 0:
+                raise TimeoutError("{}: not ready after {}s ({})".format(message, deadline, error))
+            await asyncio.sleep(min(random.uniform(0, delay), remaining))
+            delay = min(2*delay, maximum)
+
+async def tcp(address, port=22, timeout=2):
+    # A TCP connection is accepted
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    writer.close()
+    return True
+
+async def dpkg_unlocked(host):
+    # No process holds the dpkg or apt locks
+    return await host.status('sudo fuser /var/lib/dpkg/lock /var/lib/dpkg/lock-frontend /var/lib/apt/lists/lock >/dev/null 2>&1') != 0
+
+async def file_exists(host, path, timeout=1):
+    # The file exists, wait for its creation with inotifywait when available
+    directory = os.path.dirname(path)
+    return await host.status('test -f {path} || (command -v inotifywait >/dev/null && timeout {timeout} inotifywait -qq -e create,moved_to,close_write {directory} >/dev/null 2>&1; test -f {path})'.format(
+        path=path, directory=directory, timeout=timeout)) == 0
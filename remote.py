@@ -0,0 +1,93 @@
+import os
+import asyncio
+import logging
+import asyncssh
+from tracing import span
+
+# Maximum number of remote commands and transfers in flight, over all hosts
+LIMIT = 64
+
+# A host reached through one persistent SSH connection, multiplexing every command and transfer
+class Host(object):
+    def __init__(self, name, user=None, semaphore=None, **options):
+        self.name = name
+        self.user = user
+        self.semaphore = semaphore or asyncio.Semaphore(LIMIT)
+        # Host keys are not checked, instances are created on the fly
+        self.options = dict({'known_hosts': None}, **options)
+        self.connection = None
+        self.lock = asyncio.Lock()
+
+    def __str__(self):
+        return self.name
+
+    async def connect(self):
+        async with self.lock:
+            if self.connection is None:
+                with span('ssh.connect', host=self.name):
+                    if self.user:
+                        self.connection = await asyncssh.connect(self.name, username=self.user, **self.options)
+                    else:
+                        self.connection = await asyncssh.connect(self.name, **self.options)
+        return self.connection
+
+    async def execute(self, command, check=True):
+        connection = await self.connect()
+        async with self.semaphore:
+            logging.info("[{}] {}".format(self.name, command))
+            try:
+                with span('ssh.execute', host=self.name, command=command):
+                    result = await connection.run(command, check=check)
+            except asyncssh.ConnectionLost:
+                # Reconnect on the next command
+                self.connection = None
+                raise
+        return result.stdout
+
+    async def status(self, command):
+        # Run a command and return its exit status
+        connection = await self.connect()
+        async with self.semaphore:
+            with span('ssh.status', host=self.name, command=command):
+                result = await connection.run(command, check=False)
+        return result.exit_status
+
+    async def put(self, local_path, remote_path):
+        connection = await self.connect()
+        async with self.semaphore:
+            logging.info("[{}] put {} {}".format(self.name, local_path, remote_path))
+            with span('ssh.put', host=self.name, path=remote_path):
+                async with connection.start_sftp_client() as sftp:
+                    await sftp.put(os.path.expanduser(local_path), remote_path)
+
+    async def get(self, remote_path, local_path):
+        connection = await self.connect()
+        async with self.semaphore:
+            logging.info("[{}] get {} {}".format(self.name, remote_path, local_path))
+            with span('ssh.get', host=self.name, path=remote_path):
+                async with connection.start_sftp_client() as sftp:
+                    await sftp.get(remote_path, os.path.expanduser(local_path))
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            await self.connection.wait_closed()
+            self.connection = None
+
+# A set of hosts sharing a concurrency limit, the asyncio counterpart of Fabric's execute
+class Remote(object):
+    def __init__(self, hosts, user=None, limit=LIMIT, **options):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.hosts = [Host(name, user=user, semaphore=self.semaphore, **options) for name in hosts]
+
+    async def execute(self, task, hosts=None):
+        return await asyncio.gather(*[task(host) for host in (self.hosts if hosts is None else hosts)])
+
+    async def close(self):
+        await asyncio.gather(*[host.close() for host in self.hosts])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
@@ -0,0 +1,110 @@
+import logging
+from termcolor import colored
+import ipyparallel as ipp
+from pool import get_client
+from store import Store
+
+# Dataset scatter, each engine pulls its own shard from S3, the functions below run on the engines
+
+@ipp.interactive
+def locate(destination=None):
+    # The host of the engine and the files it already has in the destination directory
+    import os
+    import socket
+    found = {}
+    if destination:
+        destination = os.path.expanduser(destination)
+        for directory, directories, names in os.walk(destination):
+            for name in names:
+                path = os.path.join(directory, name)
+                found[os.path.relpath(path, destination).replace(os.sep, '/')] = os.path.getsize(path)
+    return socket.gethostname(), found
+
+@ipp.interactive
+def fetch(bucket, prefix, objects, destination=None, profile_name=None, region_name=None, workers=16):
+    # Stream the shard objects in parallel into memory (venom_shard) or into the destination directory
+    import os
+    import time
+    import posixpath
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from concurrent.futures import ThreadPoolExecutor
+    client = boto3.session.Session(profile_name=profile_name, region_name=region_name).client('s3',
+        config=Config(max_pool_connections=workers, retries={'max_attempts': 10, 'mode': 'standard'}))
+    transfer = TransferConfig(multipart_threshold=64<<20, multipart_chunksize=64<<20, max_concurrency=4)
+    root = os.path.realpath(os.path.expanduser(destination)) if destination else None
+    def get(item):
+        key, size = item
+        name = key[len(prefix):]
+        if destination:
+            # Keys that would land outside of the destination are skipped, as in Store.relative which engines do not have
+            name = posixpath.normpath(name)
+            path = os.path.join(root, name)
+            if name.startswith('/') or name in ('.', '..') or name.startswith('../') or os.path.commonpath([root, os.path.realpath(path)]) != root:
+                return name, None
+            # Already loaded by a previous scatter
+            if os.path.exists(path) and os.path.getsize(path) == size:
+                return name, 0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            client.download_file(bucket, key, path, Config=transfer)
+            return name, size
+        return name, client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [(name, result) for name, result in executor.map(get, objects) if result is not None]
+    if destination:
+        size = sum(result for name, result in results)
+    else:
+        globals().setdefault('venom_shard', {}).update(results)
+        size = sum(len(result) for name, result in results)
+    return [name for name, result in results], size, time.perf_counter()-start
+
+def assign(objects, engines, found={}):
+    # Objects already on the disk of a host stay on that host, the others go to the least loaded host (largest first),
+    # then each host spreads its objects over its engines the same way
+    hosts = {}
+    for engine, host in engines.items():
+        hosts.setdefault(host, []).append(engine)
+    loads = {host: 0 for host in hosts}
+    placed = {host: [] for host in hosts}
+    for key, size in sorted(objects.items(), key=lambda item: (-item[1], item[0])):
+        local = [host for host in hosts if found.get(host, {}).get(key) == size]
+        host = min(local or hosts, key=lambda host: (loads[host]/len(hosts[host]), host))
+        loads[host] += size
+        placed[host].append((key, size))
+    shards = {engine: [] for engine in engines}
+    for host, items in placed.items():
+        sizes = {engine: 0 for engine in hosts[host]}
+        for key, size in items:
+            engine = min(sizes, key=lambda engine: (sizes[engine], engine))
+            sizes[engine] += size
+            shards[engine].append((key, size))
+    return shards
+
+def scatter(bucket, prefix='', destination=None, client=None, profile_name=None, region_name=None, workers=16):
+    # Load the dataset under the prefix onto the engines, the aggregate throughput grows with the number of engines
+    client = client or ipp.Client()
+    view = client[:]
+    # The prefix is a directory, 'data' does not match 'dataset/'
+    prefix = Store.directory(prefix)
+    s3 = get_client('s3', profile_name, region_name)
+    objects = {item['Key']: item['Size']
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix)
+        for item in page.get('Contents', [])
+        if not item['Key'].endswith('/')}
+    located = dict(zip(client.ids, view.apply_sync(locate, destination)))
+    engines = {engine: host for engine, (host, found) in located.items()}
+    found = {host: {prefix+name: size for name, size in files.items()} for host, files in located.values()}
+    shards = assign(objects, engines, found if destination else {})
+    results = {engine: client[engine].apply_async(fetch, bucket, prefix, shard, destination, profile_name, region_name, workers)
+        for engine, shard in shards.items()}
+    report = {}
+    for engine, result in results.items():
+        names, size, duration = result.get()
+        report[engine] = {'host': engines[engine], 'objects': len(shards[engine]), 'size': size, 'duration': duration, 'names': names}
+    size = sum(item['size'] for item in report.values())
+    duration = max([item['duration'] for item in report.values()] or [0])
+    logging.info(colored("{} objects ({:.1f}MB transferred) scattered over {} engines at {:.1f}MB/s".format(
+        len(objects), size/1e6, len(engines), size/1e6/duration if duration else 0), 'green'))
+    return report
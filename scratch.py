@@ -0,0 +1,185 @@
+import os
+import time
+import fcntl
+import hashlib
+import logging
+from contextlib import contextmanager
+from pool import get_client
+
+# Local scratch space, made of the instance store (NVMe) or unused attached (EBS) volumes, striped when there are several
+SCRATCH = '/scratch'
+# Idempotent, run at every provisioning: instance store volumes come back empty after a stop, EBS volumes come back
+# formatted (and striped sets assembled under another name), they are found again by their label
+SCRATCH_LABEL = 'venom-scratch'
+SCRATCH_COMMAND = '''
+if ! mountpoint -q {scratch}
+then
+    mkdir -p {scratch}
+    command -v mdadm >/dev/null && mdadm --assemble --scan >/dev/null 2>&1
+    if [ -n "$(blkid -L {label})" ]
+    then
+        mount -o noatime LABEL={label} {scratch}
+    else
+        # Whole block devices without partitions, file system or mount point (not RAM disks)
+        devices=$(lsblk -dpno NAME,TYPE | awk '$2=="disk" && $1 !~ /zram|\/ram[0-9]/ {{print $1}}' | while read device
+        do
+            [ -z "$(lsblk -no MOUNTPOINT,FSTYPE $device | tr -d ' \\n')" ] && [ $(lsblk -no NAME $device | wc -l) -eq 1 ] && echo $device
+        done)
+        count=$(echo $devices | wc -w)
+        if [ $count -gt 1 ]
+        then
+            mdadm --create /dev/md0 --run --level=0 --raid-devices=$count $devices
+            devices=/dev/md0
+        fi
+        if [ $count -gt 0 ]
+        then
+            mkfs.ext4 -q -F -E nodiscard -L {label} $devices
+            mount -o noatime $devices {scratch}
+        fi
+    fi
+fi
+chown {user}: {scratch}
+'''
+
+# A read-through cache of bucket objects on the scratch space of a host, shared by its engines:
+# least recently used objects are evicted beyond max_size bytes (by default when the volume runs low on free space),
+# and concurrent fetches of an object by several engines (processes or threads) are done once, under a lock file per object
+class ScratchCache(object):
+    def __init__(self, bucket, path=SCRATCH+'/cache', max_size=None, reserve=0.1, profile_name=None, region_name=None):
+        self.bucket = bucket
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        # Share of the volume kept free without max_size
+        self.reserve = reserve
+        self.profile_name = profile_name
+        self.region_name = region_name
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def s3(self):
+        return get_client('s3', self.profile_name, self.region_name)
+
+    @property
+    def root(self):
+        return os.path.join(self.path, self.bucket)
+
+    def local(self, key):
+        # Objects keep their key as path, so that they can be handed to libraries reading files
+        parts = [part for part in key.split('/') if part]
+        if not parts or any(part in ('.', '..') or part.startswith('.venom-') for part in parts):
+            raise ValueError("Cannot cache {}".format(key))
+        return os.path.join(self.root, *parts)
+
+    @contextmanager
+    def lock(self, name):
+        os.makedirs(os.path.join(self.path, '.venom-locks'), exist_ok=True)
+        with open(os.path.join(self.path, '.venom-locks', hashlib.sha256(name.encode()).hexdigest()), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield file
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def get(self, key):
+        # The local path of the object, fetched on the first access only
+        path = self.local(key)
+        if self.touch(path):
+            self.hits += 1
+            return path
+        with self.lock(key):
+            # Another engine may have fetched it while we waited for the lock
+            if self.touch(path):
+                self.hits += 1
+                return path
+            self.misses += 1
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = os.path.join(os.path.dirname(path), '.venom-{}.{}.part'.format(os.path.basename(path), os.getpid()))
+            start = time.time()
+            self.s3.download_file(self.bucket, key, temporary)
+            os.replace(temporary, path)
+            logging.debug("{} fetched in {:.1f}s".format(key, time.time()-start))
+        self.evict(keep=path, added=os.path.getsize(path))
+        return path
+
+    def open(self, key, mode='rb'):
+        return open(self.get(key), mode)
+
+    def touch(self, path):
+        # Mark the object as recently used, scratch volumes are mounted noatime
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def account(self, added=0, total=None):
+        # Running size of the cache shared by the engines, kept in a file under the eviction lock
+        path = os.path.join(self.root, '.venom-size')
+        if total is None:
+            try:
+                with open(path) as file:
+                    total = int(file.read() or 0)+added
+            except FileNotFoundError:
+                total = None
+        if total is not None:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(str(total))
+        return total
+
+    def evict(self, keep=None, added=0):
+        # Remove the least recently used objects until the cache fits in max_size or, without it, until the volume
+        # has its reserve of free space again, readers keep their open files. The cache is only walked when over the bound
+        with self.lock('.venom-evict'):
+            if self.max_size is None:
+                statvfs = os.statvfs(self.path)
+                excess = (self.reserve*statvfs.f_blocks-statvfs.f_bavail)*statvfs.f_frsize
+                self.account(added)
+            else:
+                total = self.account(added)
+                excess = 1 if total is None else total-self.max_size
+            if excess <= 0:
+                return self
+            files = []
+            for directory, directories, names in os.walk(self.root):
+                for name in names:
+                    if name.startswith('.venom-'):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for mtime, size, path in files)
+            if self.max_size is not None:
+                excess = total-self.max_size
+            for mtime, size, path in sorted(files):
+                if excess <= 0:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                excess -= size
+            self.account(total=total)
+        return self
+
+    def invalidate(self, key=None):
+        # Forget an object, or every object
+        paths = [self.local(key)] if key else [os.path.join(directory, name)
+            for directory, directories, names in os.walk(self.root) for name in names if not name.startswith('.venom-')]
+        with self.lock('.venom-evict'):
+            removed = 0
+            for path in paths:
+                try:
+                    removed += os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.account(-removed)
+        return self
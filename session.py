@@ -1,9 +1,25 @@
 import os
 import json
+import fcntl
 import logging
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
 from termcolor import colored
 
 class Item(object):
+    # Fields resolved by load on first access, so that unfrozen items stay cheap
+    __lazy__ = ()
+    def __getattr__(self, name):
+        # Only called for missing attributes
+        if name in type(self).__lazy__:
+            self.__dict__[name] = None
+            try:
+                self.load(fields=(name,))
+            except:
+                del self.__dict__[name]
+                raise
+            return self.__dict__[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, name))
     # A session Item should implement freeze and unfreeze primitives
     def __freeze__(self):
         return {
@@ -19,29 +35,90 @@ class Item(object):
                 logging.warning(colored(e, 'yellow'))
         return obj
 
+# A session is a directory holding one record per stack, guarded by a file lock
 class Session(Item):
     def __init__(self, path=None):
-        self.path = path or 'session.json'
+        self.path = path or 'session'
         self.data = {}
-        if not os.path.exists(self.path):
-            with open(self.path, 'w') as file:
-                Session.dump(self.data, file)
+        # Serialized records as read, to only write records that changed
+        self.frozen = {}
+        self.lock_path = os.path.join(self.path, '.lock')
+        # Several processes may open the session for the first time at once
+        os.makedirs(self.path, exist_ok=True)
+        # Import the legacy single file session, once
+        legacy = self.path+'.json'
+        imported = os.path.join(self.path, '.legacy')
+        if os.path.isfile(legacy) and not os.path.exists(imported):
+            with self.lock():
+                if not os.path.exists(imported):
+                    logging.info("Importing legacy session {}".format(legacy))
+                    with open(legacy, 'r') as file:
+                        for key, value in json.load(file).items():
+                            # Records written since take precedence
+                            if not os.path.exists(self.record(key)):
+                                Session.save(self.record(key), Session.dumps(value))
+                    open(imported, 'w').close()
 
     def __enter__(self):
         logging.info("Openning local session at {}".format(self.path))
-        with open(self.path, 'r') as file:
-            self.data = Session.load(file)
+        self.data = {}
+        self.frozen = {}
         return self
 
     def __exit__(self, type, value, traceback):
         logging.info("Closing {}".format(self.path))
-        with open(self.path, 'w') as file:
-            Session.dump(self.data, file)
-    # Delegated methods
-    __contains__ = lambda self, key: self.data.__contains__(key)
-    __getitem__ = lambda self, key: self.data.__getitem__(key)
-    __setitem__ = lambda self, key, value: self.data.__setitem__(key, value)
-    __delitem__ = lambda self, key: self.data.__delitem__(key)
+        with self.lock():
+            for key, record in self.data.items():
+                path = self.record(key)
+                if record is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    text = Session.dumps(record)
+                    if text != self.frozen.get(key):
+                        Session.save(path, text)
+
+    @contextmanager
+    def lock(self):
+        with open(self.lock_path, 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield file
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def record(self, key):
+        return os.path.join(self.path, quote(key, safe='')+'.json')
+
+    def keys(self):
+        result = set(unquote(name[:-len('.json')]) for name in os.listdir(self.path) if name.endswith('.json'))
+        result.update(self.data)
+        return sorted(key for key in result if self.data.get(key, True) is not None)
+
+    def __contains__(self, key):
+        if key in self.data:
+            return self.data[key] is not None
+        return os.path.exists(self.record(key))
+
+    def __getitem__(self, key):
+        # Records are only read, and unfrozen, when accessed
+        if key not in self.data:
+            with self.lock():
+                with open(self.record(key), 'r') as file:
+                    text = file.read()
+            self.frozen[key] = text
+            self.data[key] = Session.loads(text)
+        if self.data[key] is None:
+            raise KeyError(key)
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.data[key] = None
     # Json methods
     @staticmethod
     def load(file):
@@ -50,3 +127,19 @@ class Session(Item):
     def dump(obj, file):
         return json.dump(obj, file, default=lambda obj: obj.__freeze__(),
         sort_keys=True, indent=2, separators=(',', ': '))
+    @staticmethod
+    def loads(text):
+        return json.loads(text, object_hook=Item.__unfreeze__)
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj, default=lambda obj: obj.__freeze__(),
+        sort_keys=True, indent=2, separators=(',', ': '))
+    @staticmethod
+    def save(path, text):
+        # Write a temporary file and rename it, so that readers never see a partial record
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary, 'w') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
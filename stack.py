@@ -3,19 +3,41 @@ import os.path
 import tempfile
 import uuid
 import logging
+import asyncio
 import subprocess
 import signal
+import threading
+from functools import partial
 from termcolor import colored
-from fabric.api import env, output, settings, parallel, serial, roles, execute, sudo, run, local, put, get
-#from fabric.contrib.files import append
 from session import Session
 from store import Store
 from cluster import Cluster
-from utilities import wait_for_ssh, wait_for_apt, apt_install, wait_for_file, daemon, write, append
+from remote import Remote
+from graph import Graph
+from netbench import benchmark
+from scatter import scatter
+from memo import Memo
+from scratch import SCRATCH, SCRATCH_LABEL, SCRATCH_COMMAND, ScratchCache
+from topology import TOPOLOGY_COMMAND, parse, detect, plan, environment, command
+from supervisor import Supervisor
+from tracing import traced, span, export, summary
+from utilities import run, sudo, put, get, wait_for_ssh, wait_for_apt, apt_install, wait_for_file, daemon, stop_daemon, write, append, fingerprint, get_fingerprints, set_fingerprint, checksum, fetch, private_address, wait, BROADCAST
 
 ID = 'ng-{}'.format(uuid.uuid1().hex[:4])
+S3CONTENTS = 'https://github.com/danielfrg/s3contents/archive/master.zip'
+# Port of the servers relaying broadcast files between hosts
+BROADCAST_PORT = 8765
+# Venom modules the engines import, e.g. to unpickle memoized functions or scratch caches
+VENOM = os.path.dirname(os.path.abspath(__file__))
+ENGINE_MODULES = ('pool.py', 'tracing.py', 'memo.py', 'scratch.py')
 
 class Stack(object):
+    # Cores per engine, None for one engine per GPU (or per host without GPU)
+    cores_per_engine = None
+    # Profile the engines use to reach S3, None for the instance role
+    engine_profile_name = None
+    # Extra asyncssh connection options (port, client_keys...)
+    ssh_options = {}
     def __init__(self, id=ID):
         self.id = id
         with Session() as session:
@@ -35,26 +57,173 @@ class Stack(object):
     def terminate(self):
         return self
 
-    def setup(self):
+    @traced('stack.bake')
+    def bake(self):
+        # Bake a provisioned worker, new instances then find its step fingerprints and skip them
+        self.cluster.load(fields=('instances',))
+        # The host of the baked instance itself, instances also lists stopped and warm pool ones
+        instance = self.cluster.running[-1]
+        host = instance.public_dns_name or instance.private_dns_name
+        image = self.cluster.bake(instance)
+        with Session() as session:
+            self.stack['image'] = {'image_id': image.id, 'steps': self.stack.get('steps', {}).get(host, {})}
+            session[self.id] = self.stack
+        return self
+
+    @traced('stack.resize')
+    def resize(self, size, force=False):
+        # Add or remove hosts, registering or unregistering their engines
+        logging.info("Resize the cluster to {}".format(size))
+        self.force = force
+        self.steps = dict(self.stack.get('steps', {}))
+        # The autoscaler resizes a long lived stack, hosts may have changed since it was loaded
+        self.cluster.load(force=True, fields=('instances',))
+        before = list(self.cluster.hosts)
+        # Unregister the engines of the hosts to be removed, the first host runs the controller
+        removed = before[max(size, 1):]
+        if removed:
+            asyncio.run(self.unregister(removed))
+        self.cluster.resize(size, late=self.background())
+        added = [host for host in self.cluster.hosts if host not in before]
+        if added:
+            asyncio.run(self.provision(added, master=not before))
+        for host in removed:
+            self.steps.pop(host, None)
+        # Record the new size and the steps done on each host
+        with Session() as session:
+            self.stack['steps'] = self.steps
+            session[self.id] = self.stack
+        self.provisioned.set()
+        return self
+
+    def background(self):
+        # Callback for the instances the cluster launches in the background, provisioned once the stack is set up
+        self.provisioned = threading.Event()
+        return self.late
+
+    def late(self, instance):
+        # Runs in the launching thread, which must not wait for the provisioning
+        def target():
+            self.provisioned.wait()
+            host = instance.public_dns_name or instance.private_dns_name
+            # Already provisioned by setup or resize
+            if host in self.steps:
+                return
+            logging.info(colored("Provision the late host {}".format(host), 'yellow'))
+            try:
+                # Against the controller files we already have
+                asyncio.run(self.provision([host], master=False))
+            except Exception as e:
+                logging.warning(colored("{} not provisioned: {}".format(host, e), 'yellow'))
+                return
+            with Session() as session:
+                self.stack['steps'] = self.steps
+                session[self.id] = self.stack
+        threading.Thread(target=target, daemon=True).start()
+
+    async def unregister(self, hosts):
+        async def stop(host):
+            for engine in self.stack.get('engines', {}).pop(host.name, [{'name': 'ipengine'}]):
+                await stop_daemon(host, engine['name'])
+        async with Remote(hosts, user=self.cluster.instance_user, **self.ssh_options) as remote:
+            await remote.execute(stop)
+
+    def benchmark(self, count=1000, size=256<<20):
+        # Engine to engine round trip time and bandwidth, e.g. to check a placement group
+        return benchmark(count=count, size=size)
+
+    def memo(self, prefix='memo/', size=256, path=None):
+        # A result cache in the stack bucket, usable from the client and, shipped with the functions, from the engines:
+        # stack.memo()(f)(x) or view.map(stack.memo(path='~/.venom/memo')(f), items)
+        return Memo(self.store.name, prefix=prefix, profile_name=self.store.profile_name, region_name=self.store.region_name,
+            engine_profile_name=self.engine_profile_name, size=size, path=path)
+
+    def scratch(self, max_size=None, path=SCRATCH+'/cache'):
+        # A read-through cache of the bucket objects on the scratch space of each host, for the engines:
+        # cache = stack.scratch(); view.map(lambda key: numpy.load(cache.get(key)), keys)
+        return ScratchCache(self.store.name, path=path, max_size=max_size, profile_name=self.engine_profile_name, region_name=self.store.region_name)
+
+    @traced('stack.broadcast')
+    def broadcast(self, local_path, remote_path, via='s3', fanout=4):
+        # Ship a file to every host, uploading it once: hosts pull it in parallel from the bucket (via='s3'),
+        # or from the hosts that already have it, each serving up to fanout peers per round (via='tree')
+        self.cluster.load(fields=('hosts',))
+        sha256 = Store.hash(os.path.expanduser(local_path))
+        return asyncio.run(self.distribute(self.cluster.hosts, local_path, remote_path, sha256, via, fanout))
+
+    async def distribute(self, hosts, local_path, remote_path, sha256, via='s3', fanout=4):
+        async with Remote(hosts, user=self.cluster.instance_user, **self.ssh_options) as remote:
+            # Hosts with the same checksum skip the transfer
+            checksums = await remote.execute(partial(checksum, path=remote_path))
+            holders = [host for host, value in zip(remote.hosts, checksums) if value == sha256]
+            missing = [host for host, value in zip(remote.hosts, checksums) if value != sha256]
+            logging.info("Broadcast {} to {} hosts, {} already have it".format(local_path, len(missing), len(holders)))
+            if not missing:
+                return []
+            if via == 's3':
+                url = self.store.stage(local_path, sha256)
+                await remote.execute(partial(fetch, url=url, path=remote_path, sha256=sha256), missing)
+                return [host.name for host in missing]
+            # Tree fan-out, the sources double or more at each round
+            staged = '{}/{}'.format(BROADCAST, sha256)
+            # Servers only listen on, and peers fetch over, the private network
+            addresses = {}
+            async def serve(host):
+                addresses[host] = await private_address(host)
+                await run(host, 'mkdir -p {broadcast} && (ln -f {path} {staged} 2>/dev/null || cp {path} {staged})'.format(
+                    broadcast=BROADCAST, path=remote_path, staged=staged))
+                await daemon(host, 'venom-broadcast', 'python3 -m http.server {port} --bind {address} --directory {broadcast}'.format(
+                    port=BROADCAST_PORT, address=addresses[host], broadcast=BROADCAST), options='--inherit')
+                await wait(host, 'curl -sf -o /dev/null http://{}:{}/'.format(addresses[host], BROADCAST_PORT), message="[{}] Waiting for the broadcast server".format(host))
+            sources = list(holders)
+            if not sources:
+                await run(missing[0], 'mkdir -p $(dirname {})'.format(remote_path))
+                await put(missing[0], local_path, remote_path)
+                sources = [missing.pop(0)]
+            served = []
+            try:
+                while missing:
+                    await remote.execute(serve, [host for host in sources if host not in served])
+                    served += [host for host in sources if host not in served]
+                    targets, missing = missing[:len(sources)*fanout], missing[len(sources)*fanout:]
+                    await asyncio.gather(*[fetch(host, 'http://{}:{}/{}'.format(addresses[sources[index%len(sources)]], BROADCAST_PORT, sha256), remote_path, sha256)
+                        for index, host in enumerate(targets)])
+                    sources += targets
+            finally:
+                async def stop(host):
+                    await stop_daemon(host, 'venom-broadcast')
+                    await run(host, 'rm -f {}'.format(staged))
+                await remote.execute(stop, served)
+            return [host.name for host in sources if host not in holders]
+
+    def trace(self, path='trace.json', format='chrome', by='name'):
+        # Write the spans recorded so far (open path in chrome://tracing or Perfetto) and log where the time went
+        export(path, format=format)
+        return summary(by=by)
+
+    def scatter(self, prefix='', destination=None, client=None, workers=16):
+        # Each engine streams its shard of the dataset under the prefix straight from the bucket,
+        # into its venom_shard global or into the destination directory of its host
+        return scatter(self.store.name, prefix, destination=destination, client=client,
+            profile_name=self.engine_profile_name, region_name=self.store.region_name, workers=workers)
+
+    @traced('stack.setup')
+    def setup(self, force=False):
         logging.info("Setup the cluster for IPyParallel")
-        # Set logging level
-        output.stdout = False
-        # Setup env
-        env.use_ssh_config = True
-        env.user = self.cluster.instance_user
-        env.hosts = self.cluster.hosts
-        env.roledefs = {
-            'master': [env.hosts[0]],
-            'workers': env.hosts
-        }
-        env.parallel = True
-        env.disable_known_hosts = True # To avoid host checking
-        wait_for_ssh()
-        execute(self.all)
-        execute(self.master)
-        # Setup workers using master config
-        execute(self.workers)
-        logging.info(colored("You can now connect to http://{}:8888".format(env.hosts[0]), 'yellow'))
+        # Re-run provisioning steps even when they are up to date
+        self.force = force
+        self.steps = {}
+        # Only the hosts are needed here
+        self.cluster.load(fields=('hosts',))
+        asyncio.run(self.provision(self.cluster.hosts))
+        # Record the steps done on each host
+        with Session() as session:
+            self.stack['steps'] = self.steps
+            session[self.id] = self.stack
+        # Hosts launched late can now be provisioned
+        if getattr(self, 'provisioned', None):
+            self.provisioned.set()
+        logging.info(colored("You can now connect to http://{}:8888".format(self.cluster.hosts[0]), 'yellow'))
         logging.info(colored("Test ipyparallel (for tensorflow_p36 env) with", 'yellow'))
         logging.info(colored("""
 import ipyparallel as ipp
@@ -74,22 +243,72 @@ for l in r.get():
 """, 'white'))
         return self
 
-    def all(self):
-        wait_for_apt()
+    async def provision(self, hosts, master=True):
+        # One persistent SSH connection per host, each host moves on as soon as its own dependencies are done
+        async with Remote(hosts, user=self.cluster.instance_user, **self.ssh_options) as remote:
+            graph = Graph()
+            for host in remote.hosts:
+                graph.add('ssh:{}'.format(host), partial(self.connect, host), host=host)
+                graph.add('all:{}'.format(host), partial(self.all, host), ['ssh:{}'.format(host)], host=host)
+            # Hosts added to a running cluster reuse the controller files we already have
+            controller = []
+            if master:
+                graph.add('controller', partial(self.controller, remote.hosts[0]), ['all:{}'.format(remote.hosts[0])], host=remote.hosts[0])
+                graph.add('notebook', partial(self.notebook, remote.hosts[0]), ['all:{}'.format(remote.hosts[0])], host=remote.hosts[0])
+                controller = ['controller']
+            # Setup workers using master config, they only need the controller files
+            for host in remote.hosts:
+                graph.add('engine:{}'.format(host), partial(self.workers, host), ['all:{}'.format(host)]+controller, host=host)
+            await graph.run()
+            engines = [task for task in graph.tasks.values() if task.name.startswith('engine:')]
+            logging.info(colored("First engine started after {:.1f}s".format(min(task.end for task in engines) - graph.start), 'yellow'))
+            return graph
+
+    async def connect(self, host):
+        await wait_for_ssh(host)
+        self.steps[host.name] = await get_fingerprints(host)
+
+    async def step(self, host, name, inputs, action):
+        # Skip provisioning steps already done on the host with the same inputs
+        value = fingerprint(name, inputs)
+        steps = self.steps.setdefault(host.name, {})
+        if not self.force and steps.get(name) == value:
+            logging.info(colored("[{}] {} is up to date".format(host, name), 'green'))
+            return
+        with span('step.{}'.format(name)):
+            await action()
+        await set_fingerprint(host, name, value)
+        steps[name] = value
+
+    async def all(self, host):
         # Install daemon utils
-        apt_install('daemon')
+        async def apt():
+            await wait_for_apt(host)
+            await apt_install(host, 'daemon')
+        await self.step(host, 'apt', ['daemon'], apt)
         # Install ipyparallel for tensorflow_p36
-        with settings(prompts={'Proceed ([y]/n)? ': 'y'}):
-            run('conda install ipyparallel')
-            run('conda install -n tensorflow_p36 ipyparallel')
-            #run('source activate tensorflow_p27; conda install ipyparallel')
+        async def conda():
+            await run(host, 'conda install -y ipyparallel')
+            await run(host, 'conda install -y -n tensorflow_p36 ipyparallel')
+            #await run(host, 'source activate tensorflow_p27; conda install -y ipyparallel')
+        await self.step(host, 'conda', ['ipyparallel', 'tensorflow_p36'], conda)
+        # Format and mount the local disks as scratch space, every time as instance store volumes come back empty after a stop
+        await sudo(host, SCRATCH_COMMAND.format(scratch=SCRATCH, label=SCRATCH_LABEL, user=self.cluster.instance_user))
 
-    @roles('master')
-    def master(self):
+    async def controller(self, host):
+        # Run ipcontroller, removing files left by a previous controller or a baked image
+        await run(host, 'rm -f /home/ubuntu/.ipython/profile_default/security/ipcontroller-*.json')
+        await daemon(host, 'ipcontroller', 'ipcontroller --ip="*"')
+        await wait_for_file(host, '/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json')
+        await wait_for_file(host, '/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json')
+        await get(host, '/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json', '~/.ipython/profile_default/security/ipcontroller-client.json')
+        await get(host, '/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json', '~/.ipython/profile_default/security/ipcontroller-engine.json')
+
+    async def notebook(self, host):
         # Install s3contents to read notebooks from S3
-        # run('pip install s3contents')
-        run('pip install https://github.com/danielfrg/s3contents/archive/master.zip')
-        write('/home/ubuntu/.jupyter/jupyter_notebook_config.py', '''
+        # await run(host, 'pip install s3contents')
+        await self.step(host, 's3contents', [S3CONTENTS], partial(run, host, 'pip install {}'.format(S3CONTENTS)))
+        await write(host, '/home/ubuntu/.jupyter/jupyter_notebook_config.py', '''
 from s3contents import S3ContentsManager
 c = get_config()
 # Use existing config
@@ -100,22 +319,29 @@ c.NotebookApp.contents_manager_class = S3ContentsManager
 c.S3ContentsManager.bucket = "{bucket}"
 c.S3ContentsManager.sse = "aws:kms"
 '''.format(bucket=self.store.name))
-        # Run ipcontroller
-        daemon('ipcontroller', 'ipcontroller --ip="*"')
-        local('mkdir -p ~/.ipython/profile_default/security/')
-        wait_for_file('/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json')
-        wait_for_file('/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json')
-        get('/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json', '~/.ipython/profile_default/security/ipcontroller-client.json')
-        get('/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json', '~/.ipython/profile_default/security/ipcontroller-engine.json')
-        daemon('notebook', 'jupyter notebook --ip="*" --NotebookApp.token=""')
-        sudo('ipcluster nbextension enable')
-
-    @roles('workers')
-    def workers(self):
-        run('mkdir -p /home/ubuntu/.ipython/profile_default/security/')
-        put('~/.ipython/profile_default/security/ipcontroller-client.json', '/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json')
-        put('~/.ipython/profile_default/security/ipcontroller-engine.json', '/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json')
-        daemon('ipengine', 'ipengine --file=/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json --ip="*"')
+        await daemon(host, 'notebook', 'jupyter notebook --ip="*" --NotebookApp.token=""')
+        await sudo(host, 'ipcluster nbextension enable')
+
+    async def workers(self, host):
+        await run(host, 'mkdir -p /home/ubuntu/.ipython/profile_default/security/')
+        await put(host, '~/.ipython/profile_default/security/ipcontroller-client.json', '/home/ubuntu/.ipython/profile_default/security/ipcontroller-client.json')
+        await put(host, '~/.ipython/profile_default/security/ipcontroller-engine.json', '/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json')
+        # Venom libraries for the engines
+        async def modules():
+            await run(host, 'mkdir -p /home/ubuntu/venom && pip install termcolor')
+            for name in ENGINE_MODULES:
+                await put(host, os.path.join(VENOM, name), '/home/ubuntu/venom/{}'.format(name))
+        await self.step(host, 'modules', [Store.hash(os.path.join(VENOM, name)) for name in ENGINE_MODULES], modules)
+        # One engine per GPU or per group of cores, pinned to its devices
+        engines = plan(parse(await run(host, TOPOLOGY_COMMAND)), cores_per_engine=self.cores_per_engine)
+        names = [engine['name'] for engine in engines]
+        for name in ['ipengine']+[engine['name'] for engine in self.stack.get('engines', {}).get(host.name, [])]:
+            if name not in names:
+                await stop_daemon(host, name)
+        for engine in engines:
+            await daemon(host, engine['name'], command(engine, 'env PYTHONPATH=/home/ubuntu/venom ipengine --file=/home/ubuntu/.ipython/profile_default/security/ipcontroller-engine.json --ip="*"'))
+        # Expose the engine to device map to clients
+        self.stack.setdefault('engines', {})[host.name] = engines
 
 
 OATH_EU_WEST_1_AMI = 'ami-55d6882c'
@@ -165,7 +391,10 @@ class Oath(Stack):
 
     def create(self):
         self.store.create()
-        self.cluster.create()
+        self.cluster.create(late=self.background())
+        # Record the ids and placement of the new instances
+        with Session() as session:
+            session[self.id] = self.stack
         return self
 
     def terminate(self):
@@ -208,7 +437,10 @@ class Home(Stack):
 
     def create(self):
         self.store.create()
-        self.cluster.create()
+        self.cluster.create(late=self.background())
+        # Record the ids and placement of the new instances
+        with Session() as session:
+            session[self.id] = self.stack
         return self
 
     def terminate(self):
@@ -226,14 +458,17 @@ class Home(Stack):
 
 # A home cluster
 class Local(Stack):
-    def __init__(self, id=ID, size=4, profile_name='default', tags=()):
+    def __init__(self, id=ID, size=None, profile_name='default', tags=()):
         self.id = id
-        self.size = size
+        # One engine per core by default
+        self.size = size or os.cpu_count()
         self.profile_name = profile_name
+        # Local engines reach S3 with the same profile
+        self.engine_profile_name = profile_name
         self.tags = tags
         # self.path = os.path.join(tempfile.gettempdir(), self.id)
         self.path = os.path.join('/tmp', self.id)
-        self.subprocesses = []
+        self.supervisor = Supervisor(self.path)
         with Session() as session:
             # Get stack
             if self.id in session:
@@ -253,31 +488,63 @@ class Local(Stack):
         return self
 
     def terminate(self):
+        self.supervisor.shutdown()
         with Session() as session:
             del session[self.id]
             self.stack = None
         return self
 
-    def setup(self):
+    def install(self, name, package):
+        # Skip packages installed by a previous setup with the same inputs, as steps do on remote hosts
+        steps = self.stack.setdefault('steps', {}).setdefault('localhost', {})
+        value = fingerprint(name, [package])
+        if not self.force and steps.get(name) == value:
+            logging.info(colored("[localhost] {} is up to date".format(name), 'green'))
+            return
+        with span('step.{}'.format(name), host='localhost'):
+            if subprocess.run('pip3 install {}'.format(package), shell=True).returncode == 0:
+                steps[name] = value
+
+    @traced('stack.setup')
+    def setup(self, force=False):
         logging.info("Setup the cluster for IPyParallel")
+        # Re-run installs even when they are up to date
+        self.force = force
         try:
             os.mkdir(self.path)
         except FileExistsError as e:
             logging.info("{} already exists".format(self.path))
-        subprocess.run('pip3 install ipyparallel', shell=True)
-        subprocess.run('pip3 install https://github.com/danielfrg/s3contents/archive/master.zip', shell=True)
-        self.subprocesses.append(subprocess.Popen('ipcontroller &', shell=True))
-        subprocess.run('''echo 'from s3contents import S3ContentsManager
+        self.install('ipyparallel', 'ipyparallel')
+        self.install('s3contents', S3CONTENTS)
+        # Start the controller and wait for its connection files, removing the ones of a previous controller
+        security = os.path.expanduser('~/.ipython/profile_default/security')
+        for name in ('ipcontroller-client.json', 'ipcontroller-engine.json'):
+            if os.path.exists(os.path.join(security, name)):
+                os.remove(os.path.join(security, name))
+        self.supervisor.start('ipcontroller', ['ipcontroller'])
+        self.supervisor.wait_for_file(os.path.join(security, 'ipcontroller-client.json'))
+        self.supervisor.wait_for_file(os.path.join(security, 'ipcontroller-engine.json'))
+        with open(os.path.join(self.path, 'jupyter_notebook_config.py'), 'w') as file:
+            file.write('''from s3contents import S3ContentsManager
 c = get_config()
 # Set working dir
 c.NotebookApp.notebook_dir = "{path}"
 # Tell Jupyter to use S3ContentsManager for all storage.
 c.NotebookApp.contents_manager_class = S3ContentsManager
-c.S3ContentsManager.bucket = "{bucket}"' > {path}/jupyter_notebook_config.py
-'''.format(bucket=self.store.name, path=self.path), shell=True)
-        for host in range(self.size):
-            self.subprocesses.append(subprocess.Popen('cd {path}; ipengine &'.format(path=self.path), shell=True))
-        self.subprocesses.append(subprocess.Popen('jupyter notebook --ip="*" --NotebookApp.token="" --config {path}/jupyter_notebook_config.py'.format(path=self.path), shell=True))
+c.S3ContentsManager.bucket = "{bucket}"
+'''.format(bucket=self.store.name, path=self.path))
+        # Pin engines to CPU groups and GPUs, restart them if they crash
+        engines = plan(detect(), count=self.size)
+        processes = [self.supervisor.start(engine['name'], ['ipengine'], env=dict(environment(engine), PYTHONPATH=VENOM), cpus=engine['cpus'], restart=True)
+            for engine in engines]
+        self.supervisor.start('notebook', ['jupyter', 'notebook', '--ip=*', '--NotebookApp.token=', '--config',
+            os.path.join(self.path, 'jupyter_notebook_config.py')], restart=True)
+        for process in processes:
+            self.supervisor.wait_for_log(process, 'Completed registration')
+        logging.info(colored("{} engines registered".format(len(processes)), 'green'))
+        with Session() as session:
+            self.stack['engines'] = {'localhost': engines}
+            session[self.id] = self.stack
         logging.info(colored("You can now connect to http://localhost:8888", 'yellow'))
         logging.info(colored("Test ipyparallel (for tensorflow_p36 env) with", 'yellow'))
         logging.info(colored("""
@@ -1,12 +1,27 @@
+import os
+import posixpath
 from os.path import expanduser
 import json
+import hashlib
 import logging
 import random
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from termcolor import colored
-import boto3
 from session import Item
+from pool import get_session, get_resource
+from tracing import ThreadPoolExecutor, traced
+
+# Lazy fields resolved by Store.load
+FIELDS = ('bucket',)
+# Local cache of the synced files hashes and object ETags, kept in the synced directory
+MANIFEST = '.venom-manifest.json'
+# Parallel multipart transfers
+TRANSFER = TransferConfig(multipart_threshold=64<<20, multipart_chunksize=64<<20, max_concurrency=8)
+TRANSFERS = 16
 
 class Store(Item):
+    __lazy__ = FIELDS
     def __init__(self, id='venom', profile_name='default', region_name='eu-west-1', tags=()):
         self.id = id
         self.profile_name = profile_name
@@ -20,16 +35,21 @@ class Store(Item):
                 'Key': 'Name',
                 'Value': self.name
             }]
-        self.aws = boto3.session.Session(profile_name=self.profile_name, region_name=self.region_name)
-        self.s3 = self.aws.resource('s3')
-        self.bucket = None
-        # Load lazy fields
-        self.load()
+        # AWS handles and the bucket are only resolved on first access
+
+    @property
+    def aws(self):
+        return get_session(self.profile_name, self.region_name)
+
+    @property
+    def s3(self):
+        return get_resource('s3', self.profile_name, self.region_name)
 
-    def load(self, force=False):
+    @traced('store.load')
+    def load(self, force=False, fields=FIELDS):
         if force:
             self.bucket = None
-        if not self.bucket:
+        if 'bucket' in fields and not self.__dict__.get('bucket'):
             if self.s3.Bucket(self.name).creation_date:
                 self.bucket = self.s3.Bucket(self.name)
                 logging.info("{} found".format(self.name))
@@ -38,6 +58,7 @@ class Store(Item):
                 logging.info("{} not found".format(self.name))
         return self
 
+    @traced('store.create')
     def create(self):
         # Create bucket
         logging.info("Create the {} S3 bucket".format(self.name))
@@ -49,6 +70,160 @@ class Store(Item):
             logging.info(colored("{} S3 bucket created".format(self.name), 'green'))
         return self
 
+    @traced('store.sync_up')
+    def sync_up(self, path, prefix='', check=True):
+        # Upload the files whose content changed, check=False trusts the manifest instead of listing the bucket
+        path = expanduser(path)
+        prefix = self.directory(prefix)
+        manifest = self.manifest(path, prefix)
+        files = manifest['files']
+        remote = self.list(prefix) if check else None
+        uploads = []
+        local = self.scan(path, files)
+        # Forget the files removed since the last sync
+        for name in set(files) - set(local):
+            del files[name]
+        for name, sha256 in local.items():
+            key = prefix+name
+            entry = files[name]
+            if entry.get('uploaded') == sha256 and (remote is None or remote.get(key) == entry.get('etag')):
+                continue
+            uploads.append((name, key, sha256))
+        def upload(item):
+            name, key, sha256 = item
+            client = self.s3.meta.client
+            client.upload_file(os.path.join(path, name), self.name, key, ExtraArgs={'Metadata': {'sha256': sha256}}, Config=TRANSFER)
+            return name, sha256, client.head_object(Bucket=self.name, Key=key)['ETag']
+        with ThreadPoolExecutor(max_workers=TRANSFERS) as executor:
+            for name, sha256, etag in executor.map(upload, uploads):
+                files[name].update({'uploaded': sha256, 'etag': etag})
+        self.save_manifest(path, manifest)
+        logging.info(colored("{} files uploaded to {}/{}".format(len(uploads), self.name, prefix), 'green'))
+        return [name for name, key, sha256 in uploads]
+
+    @traced('store.sync_down')
+    def sync_down(self, path, prefix=''):
+        # Download the objects whose content is not already in the local files
+        path = expanduser(path)
+        prefix = self.directory(prefix)
+        manifest = self.manifest(path, prefix)
+        files = manifest['files']
+        client = self.s3.meta.client
+        def fetch(item):
+            key, etag = item
+            name = self.relative(path, key[len(prefix):])
+            if name is None:
+                logging.warning(colored("{} skipped, it would be written outside of {}".format(key, path), 'yellow'))
+                return None
+            local = os.path.join(path, name)
+            entry = files.get(name, {})
+            if os.path.exists(local):
+                stat = os.stat(local)
+                # Unchanged since the last sync on both sides
+                if entry.get('etag') == etag and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+                    return None
+                # Same content under a different ETag
+                sha256 = self.hash(local)
+                if client.head_object(Bucket=self.name, Key=key).get('Metadata', {}).get('sha256') == sha256:
+                    return name, {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256, 'uploaded': sha256, 'etag': etag}, False
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            client.download_file(self.name, key, local, Config=TRANSFER)
+            stat = os.stat(local)
+            sha256 = self.hash(local)
+            return name, {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256, 'uploaded': sha256, 'etag': etag}, True
+        with ThreadPoolExecutor(max_workers=TRANSFERS) as executor:
+            results = [result for result in executor.map(fetch, self.list(prefix).items()) if result]
+        for name, entry, downloaded in results:
+            files[name] = entry
+        self.save_manifest(path, manifest)
+        downloads = [name for name, entry, downloaded in results if downloaded]
+        logging.info(colored("{} files downloaded from {}/{}".format(len(downloads), self.name, prefix), 'green'))
+        return downloads
+
+    @traced('store.stage')
+    def stage(self, path, sha256, expires=3600):
+        # Upload a file once under its checksum and return a presigned URL to download it, without credentials
+        path = expanduser(path)
+        key = 'broadcast/{}/{}'.format(sha256, os.path.basename(path))
+        client = self.s3.meta.client
+        try:
+            staged = client.head_object(Bucket=self.name, Key=key).get('Metadata', {}).get('sha256') == sha256
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                raise
+            staged = False
+        if not staged:
+            logging.info("Stage {} to {}/{}".format(path, self.name, key))
+            client.upload_file(path, self.name, key, ExtraArgs={'Metadata': {'sha256': sha256}}, Config=TRANSFER)
+        return client.generate_presigned_url('get_object', Params={'Bucket': self.name, 'Key': key}, ExpiresIn=expires)
+
+    @staticmethod
+    def directory(prefix):
+        # A prefix is a directory of the bucket: 'data', '/data/' and 'data/' all mean 'data/'
+        prefix = prefix.strip('/')
+        return prefix+'/' if prefix else ''
+
+    @staticmethod
+    def relative(path, name):
+        # The normalized relative path of an object under path, None when it would land outside of it
+        name = posixpath.normpath(name)
+        if name.startswith('/') or name in ('.', '..', MANIFEST) or name.startswith('../'):
+            return None
+        root = os.path.realpath(path)
+        if os.path.commonpath([root, os.path.realpath(os.path.join(root, name))]) != root:
+            return None
+        return name
+
+    def list(self, prefix=''):
+        # One paginated listing: key -> ETag
+        return {item['Key']: item['ETag']
+            for page in self.s3.meta.client.get_paginator('list_objects_v2').paginate(Bucket=self.name, Prefix=prefix)
+            for item in page.get('Contents', [])
+            if not item['Key'].endswith('/')}
+
+    def scan(self, path, files):
+        # Hash local files, reusing the manifest hashes of files whose size and mtime did not change
+        result = {}
+        for directory, directories, names in os.walk(path):
+            for name in names:
+                local = os.path.join(directory, name)
+                relative = os.path.relpath(local, path).replace(os.sep, '/')
+                if relative == MANIFEST:
+                    continue
+                stat = os.stat(local)
+                entry = files.setdefault(relative, {})
+                if entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime or 'sha256' not in entry:
+                    entry.update({'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': self.hash(local)})
+                result[relative] = entry['sha256']
+        return result
+
+    @staticmethod
+    def hash(local):
+        sha256 = hashlib.sha256()
+        with open(local, 'rb') as file:
+            for chunk in iter(lambda : file.read(1<<20), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def manifest(self, path, prefix):
+        try:
+            with open(os.path.join(path, MANIFEST), 'r') as file:
+                manifest = json.load(file)
+        except (IOError, ValueError):
+            manifest = {}
+        # Only trust a manifest of the same bucket and prefix
+        if manifest.get('bucket') != self.name or manifest.get('prefix') != prefix:
+            manifest = {'bucket': self.name, 'prefix': prefix, 'files': {}}
+        return manifest
+
+    def save_manifest(self, path, manifest):
+        os.makedirs(path, exist_ok=True)
+        temporary = os.path.join(path, MANIFEST+'.tmp')
+        with open(temporary, 'w') as file:
+            json.dump(manifest, file, sort_keys=True, indent=2, separators=(',', ': '))
+        os.replace(temporary, os.path.join(path, MANIFEST))
+
+    @traced('store.terminate')
     def terminate(self):
         # Terminate  bucket
         if self.bucket:
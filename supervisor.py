@@ -0,0 +1,120 @@
+import os
+import re
+import time
+import shutil
+import signal
+import logging
+import threading
+import subprocess
+from termcolor import colored
+
+# A supervised local process, running in its own session so that terminal signals do not reach it
+class Process(object):
+    def __init__(self, name, args, path, env=None, cpus=None, restart=False):
+        self.name = name
+        self.args = list(args)
+        self.path = path
+        self.env = dict(env or {})
+        self.cpus = cpus
+        self.restart = restart
+        self.restarts = 0
+        self.log = os.path.join(self.path, '{}.log'.format(self.name))
+        self.popen = None
+        self.offset = 0
+
+    def start(self):
+        args = self.args
+        # Pin before exec, so that every thread of the process inherits the affinity, preexec_fn is unsafe with threads
+        if self.cpus and shutil.which('taskset'):
+            args = ['taskset', '-c', ','.join(str(cpu) for cpu in sorted(self.cpus))] + args
+        logging.info("Start {}: {}".format(self.name, ' '.join(args)))
+        with open(self.log, 'a') as log:
+            # The log is kept across restarts, readiness is only looked for in what this run writes
+            self.offset = log.tell()
+            self.popen = subprocess.Popen(args, cwd=self.path, env=dict(os.environ, **self.env),
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        # Without taskset, pin right after the start, threads the process already made keep their affinity
+        if self.cpus and args is self.args and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(self.popen.pid, self.cpus)
+        return self
+
+    @property
+    def running(self):
+        return self.popen is not None and self.popen.poll() is None
+
+    def stop(self, timeout=10):
+        if self.running:
+            logging.info("Stop {}".format(self.name))
+            self.popen.send_signal(signal.SIGTERM)
+            try:
+                self.popen.wait(timeout)
+            except subprocess.TimeoutExpired:
+                logging.warning(colored("Kill {}".format(self.name), 'yellow'))
+                self.popen.kill()
+                self.popen.wait()
+        return self
+
+# Start processes in order, wait for their readiness, restart crashed ones and shut them down gracefully
+class Supervisor(object):
+    def __init__(self, path, interval=1, max_restarts=5):
+        self.path = path
+        self.interval = interval
+        self.max_restarts = max_restarts
+        self.processes = []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.monitor = None
+
+    def start(self, name, args, env=None, cpus=None, restart=False):
+        process = Process(name, args, self.path, env=env, cpus=cpus, restart=restart).start()
+        with self.lock:
+            self.processes.append(process)
+        if self.monitor is None:
+            self.monitor = threading.Thread(target=self.watch, daemon=True)
+            self.monitor.start()
+        return process
+
+    def watch(self):
+        while not self.stopping.wait(self.interval):
+            with self.lock:
+                for process in self.processes:
+                    if process.restart and not process.running and process.restarts < self.max_restarts:
+                        process.restarts += 1
+                        logging.warning(colored("{} exited with {}, restarting ({}/{})".format(
+                            process.name, process.popen.returncode, process.restarts, self.max_restarts), 'yellow'))
+                        process.start()
+
+    def wait_for_file(self, path, timeout=60):
+        deadline = time.time()+timeout
+        while not os.path.exists(path):
+            if time.time() > deadline:
+                raise TimeoutError("{} was not created".format(path))
+            time.sleep(0.1)
+        return path
+
+    def wait_for_log(self, process, pattern, timeout=60):
+        # Wait until the process log matches pattern
+        deadline = time.time()+timeout
+        expression = re.compile(pattern)
+        while True:
+            with open(process.log, 'r') as log:
+                log.seek(process.offset)
+                if expression.search(log.read()):
+                    return process
+            if not process.running and not process.restart:
+                raise Exception("{} exited with {}".format(process.name, process.popen.returncode))
+            if time.time() > deadline:
+                raise TimeoutError("{} is not ready".format(process.name))
+            time.sleep(0.1)
+
+    def shutdown(self, timeout=10):
+        # Stop in reverse start order, the controller last
+        self.stopping.set()
+        if self.monitor is not None:
+            self.monitor.join()
+            self.monitor = None
+        with self.lock:
+            for process in reversed(self.processes):
+                process.stop(timeout)
+            self.processes = []
+        return self
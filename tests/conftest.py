@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# Modules live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def aws(monkeypatch):
+    # Mocked AWS with fake credentials, and no client left from another test
+    moto = pytest.importorskip('moto')
+    import pool
+    for key in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(key, 'testing')
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    pool.clear()
+    with moto.mock_aws():
+        yield
+    pool.clear()
@@ -0,0 +1,36 @@
+import autoscale
+from autoscale import Autoscaler
+
+class Client(object):
+    opened = 0
+    def __init__(self):
+        Client.opened += 1
+        self.closed = False
+
+    def queue_status(self):
+        return {0: {'queue': 0, 'tasks': 0, 'completed': 0}, 'unassigned': 0}
+
+    def close(self):
+        self.closed = True
+
+class Cluster(object):
+    size = 1
+
+class Stack(object):
+    cluster = Cluster()
+
+def test_one_client_is_kept_and_closed(monkeypatch):
+    monkeypatch.setattr(autoscale.ipp, 'Client', Client)
+    autoscaler = Autoscaler(Stack())
+    for _ in range(3):
+        assert autoscaler.step() == 1
+    client = autoscaler.client
+    autoscaler.stop()
+    assert Client.opened == 1 and client.closed and autoscaler.client is None
+
+def test_given_client_is_left_open():
+    client = Client()
+    autoscaler = Autoscaler(Stack(), client=client)
+    autoscaler.step()
+    autoscaler.stop()
+    assert not client.closed and autoscaler.client is client
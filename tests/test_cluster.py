@@ -0,0 +1,37 @@
+import boto3
+from cluster import Cluster
+
+REGION = 'eu-west-1'
+
+def test_enable_ena_skips_images_without_the_driver(aws):
+    # Mocked images do not report EnaSupport, stopping the instances would lose them
+    ec2 = boto3.resource('ec2', region_name=REGION)
+    image_id = ec2.meta.client.describe_images()['Images'][0]['ImageId']
+    instance, = ec2.create_instances(ImageId=image_id, MinCount=1, MaxCount=1, InstanceType='m5.large')
+    cluster = Cluster(id='test', profile_name=None, region_name=REGION, image_id=image_id, instance_type='m5.large')
+    cluster.instances = [instance]
+    stopped = []
+    cluster.ec2.meta.client.meta.events.register('before-call.ec2.StopInstances', lambda **kwargs: stopped.append(kwargs))
+    cluster.enable_ena()
+    instance.reload()
+    assert not stopped and instance.state['Name'] == 'running'
+
+def test_stop_terminates_spot_instances(aws):
+    ec2 = boto3.resource('ec2', region_name=REGION)
+    image_id = ec2.meta.client.describe_images()['Images'][0]['ImageId']
+    on_demand, = ec2.create_instances(ImageId=image_id, MinCount=1, MaxCount=1, InstanceType='m5.large')
+    spot, = ec2.create_instances(ImageId=image_id, MinCount=1, MaxCount=1, InstanceType='m5.large',
+        InstanceMarketOptions={'MarketType': 'spot', 'SpotOptions': {'SpotInstanceType': 'one-time'}})
+    spot.load()
+    assert spot.meta.data.get('InstanceLifecycle') == 'spot'
+    cluster = Cluster(id='test', profile_name=None, region_name=REGION, image_id=image_id, instance_type='m5.large')
+    cluster.instances = [on_demand, spot]
+    cluster.placement = {}
+    stopped = []
+    cluster.ec2.meta.client.meta.events.register('provide-client-params.ec2.StopInstances', lambda params, **kwargs: stopped.extend(params['InstanceIds']))
+    cluster.stop()
+    on_demand.reload()
+    spot.reload()
+    assert stopped == [on_demand.id]
+    assert (on_demand.state['Name'], spot.state['Name']) == ('stopped', 'terminated')
+    assert cluster.instances == [on_demand]
@@ -0,0 +1,63 @@
+import pickle
+import pytest
+from memo import Memo
+
+@pytest.fixture
+def memo(aws):
+    import boto3
+    boto3.client('s3', region_name='eu-west-1').create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+    return Memo('test-bucket', region_name='eu-west-1', size=2)
+
+# Module level, a list captured by the function would be part of its key
+calls = []
+
+def f(x, y=1):
+    calls.append(x)
+    return x*y
+
+def test_results_are_reused(memo):
+    del calls[:]
+    g = memo(f)
+    assert [g(1), g(1), g(1, y=2)] == [1, 1, 2]
+    assert calls == [1, 1]
+    # Another client, without the local tiers, finds them in the bucket
+    other = pickle.loads(pickle.dumps(memo))
+    assert other(f)(1) == 1 and calls == [1, 1] and other.hits['s3'] == 1
+
+def test_closures_have_their_own_keys(memo):
+    def make(k):
+        def f(x):
+            return x*k
+        return f
+    assert memo.key(make(2), (1,)) != memo.key(make(3), (1,))
+    assert memo(make(2))(1) == 2 and memo(make(3))(1) == 3
+
+def test_defaults_are_part_of_the_key(memo):
+    def g(x, s=2):
+        return x*s
+    first = memo.key(g, (1,))
+    def g(x, s=3):
+        return x*s
+    assert memo.key(g, (1,)) != first
+    def h(x, *, s=2):
+        return x*s
+    first = memo.key(h, (1,))
+    h.__kwdefaults__ = {'s': 3}
+    assert memo.key(h, (1,)) != first
+
+def test_recursive_closures(memo):
+    def make():
+        def fib(n):
+            return n if n < 2 else fib(n-1)+fib(n-2)
+        return fib
+    assert memo(make())(10) == 55
+    assert memo.key(make(), (10,)) == memo.key(make(), (10,))
+
+def test_unpicklable_closures_and_defaults(memo):
+    import threading
+    lock = threading.Lock()
+    def g(x, guard=threading.Lock()):
+        with lock, guard:
+            return x+1
+    assert memo(g)(1) == 2
+    assert memo.key(g, (1,)) == memo.key(g, (1,))
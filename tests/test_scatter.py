@@ -0,0 +1,65 @@
+import os
+import boto3
+import pytest
+from scatter import scatter, assign
+
+REGION = 'eu-west-1'
+
+# Engines running in this process
+class Result(object):
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+class Engine(object):
+    def apply_async(self, function, *args):
+        return Result(function(*args))
+
+class View(object):
+    def __init__(self, count):
+        self.count = count
+
+    def apply_sync(self, function, *args):
+        return [function(*args) for _ in range(self.count)]
+
+class Client(object):
+    def __init__(self, count=2):
+        self.ids = list(range(count))
+
+    def __getitem__(self, key):
+        return View(len(self.ids)) if isinstance(key, slice) else Engine()
+
+@pytest.fixture
+def bucket(aws):
+    boto3.client('s3', region_name=REGION).create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': REGION})
+    return boto3.resource('s3', region_name=REGION).Bucket('test-bucket')
+
+def names(report):
+    return sorted(name for item in report.values() for name in item['names'])
+
+def test_prefix_does_not_match_siblings(bucket, tmp_path):
+    bucket.put_object(Key='data/a.txt', Body=b'a')
+    bucket.put_object(Key='data/sub/b.txt', Body=b'b')
+    bucket.put_object(Key='dataset/c.txt', Body=b'c')
+    report = scatter('test-bucket', 'data', destination=str(tmp_path/'dst'), client=Client(), region_name=REGION)
+    assert names(report) == ['a.txt', 'sub/b.txt']
+    assert not os.path.exists(str(tmp_path/'dst'/'set'))
+    # Same directory however the prefix is written, and nothing to fetch again
+    report = scatter('test-bucket', '/data/', destination=str(tmp_path/'dst'), client=Client(), region_name=REGION)
+    assert names(report) == ['a.txt', 'sub/b.txt'] and sum(item['size'] for item in report.values()) == 0
+
+@pytest.mark.parametrize('key', ['x/../../escape.txt', 'x//escape.txt', 'x/../escape.txt'])
+def test_keys_outside_of_the_destination_are_skipped(bucket, tmp_path, key):
+    bucket.put_object(Key=key, Body=b'escape')
+    bucket.put_object(Key='x/ok.txt', Body=b'ok')
+    report = scatter('test-bucket', 'x/', destination=str(tmp_path/'a'/'dst'), client=Client(), region_name=REGION)
+    assert names(report) == ['ok.txt']
+    assert not os.path.exists(str(tmp_path/'escape.txt'))
+    assert not os.path.exists(str(tmp_path/'a'/'escape.txt'))
+    assert not os.path.exists('/escape.txt')
+
+def test_local_objects_stay_on_their_host():
+    shards = assign({'a': 10, 'b': 10}, {0: 'h0', 1: 'h1'}, {'h1': {'a': 10}})
+    assert shards[1] == [('a', 10)] and shards[0] == [('b', 10)]
@@ -0,0 +1,59 @@
+import os
+import boto3
+import pytest
+import scratch
+from scratch import ScratchCache
+
+REGION = 'eu-west-1'
+
+@pytest.fixture
+def bucket(aws):
+    s3 = boto3.client('s3', region_name=REGION)
+    s3.create_bucket(Bucket='test-bucket', CreateBucketConfiguration={'LocationConstraint': REGION})
+    for index in range(4):
+        s3.put_object(Bucket='test-bucket', Key='data/{}'.format(index), Body=b'x'*100)
+    return 'test-bucket'
+
+@pytest.fixture
+def walks(monkeypatch):
+    # Count the walks of the cache
+    calls = []
+    walk = os.walk
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return walk(*args, **kwargs)
+    monkeypatch.setattr(scratch.os, 'walk', counted)
+    return calls
+
+def test_least_recently_used_objects_are_evicted(bucket, tmp_path):
+    cache = ScratchCache(bucket, path=str(tmp_path), max_size=250, region_name=REGION)
+    paths = [cache.get('data/{}'.format(index)) for index in range(2)]
+    os.utime(paths[0], (0, 0))
+    os.utime(paths[1], (1, 1))
+    # data/0 is used again, data/1 is then the oldest
+    cache.get('data/0')
+    cache.get('data/2')
+    assert [os.path.exists(path) for path in paths] == [True, False]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_cache_is_walked_only_over_the_bound(bucket, tmp_path, walks):
+    cache = ScratchCache(bucket, path=str(tmp_path), max_size=350, region_name=REGION)
+    # Once to learn the size of the cache
+    for index in range(3):
+        cache.get('data/{}'.format(index))
+    assert len(walks) == 1
+    cache.get('data/3')
+    assert len(walks) == 2 and cache.account() == 300
+
+def test_default_bound_is_the_free_space(bucket, tmp_path, walks):
+    cache = ScratchCache(bucket, path=str(tmp_path), region_name=REGION)
+    for index in range(4):
+        cache.get('data/{}'.format(index))
+    assert not walks
+    # Nothing fits in a volume that has to stay entirely free
+    cache.reserve = 1
+    cache.get('data/0')
+    cache.invalidate('data/1')
+    cache.get('data/1')
+    assert len(walks) == 1
+    assert sorted(os.listdir(os.path.join(cache.root, 'data'))) == ['1']
@@ -0,0 +1,29 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from session import Session
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path/'session')
+    with Session(path) as session:
+        session['a'] = {'steps': {'host': {'apt': '1'}}}
+        session['b'] = {}
+    with Session(path) as session:
+        assert session.keys() == ['a', 'b']
+        assert session['a']['steps']['host']['apt'] == '1'
+        del session['b']
+    with Session(path) as session:
+        assert 'b' not in session and session.keys() == ['a']
+
+def test_legacy_session_is_imported_once(tmp_path):
+    path = str(tmp_path/'session')
+    with open(path+'.json', 'w') as file:
+        json.dump({'a': {'size': 1}, 'b': {'size': 2}}, file)
+    # Concurrent first openings
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda index: Session(path), range(8)))
+    with Session(path) as session:
+        assert session.keys() == ['a', 'b']
+        del session['b']
+    # Deleted records do not come back from the legacy file
+    with Session(path) as session:
+        assert session.keys() == ['a']
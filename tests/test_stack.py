@@ -0,0 +1,26 @@
+import stack
+from stack import Local
+
+class Completed(object):
+    def __init__(self, returncode):
+        self.returncode = returncode
+
+def test_local_installs_are_fingerprinted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    commands = []
+    returncode = [1]
+    monkeypatch.setattr(stack.subprocess, 'run', lambda command, shell: commands.append(command) or Completed(returncode[0]))
+    local = Local(id='test-local', profile_name=None)
+    local.force = False
+    # A failed install is tried again
+    local.install('ipyparallel', 'ipyparallel')
+    returncode[0] = 0
+    local.install('ipyparallel', 'ipyparallel')
+    local.install('ipyparallel', 'ipyparallel')
+    assert commands == ['pip3 install ipyparallel']*2
+    # Unless forced, or the package changes
+    local.force = True
+    local.install('ipyparallel', 'ipyparallel')
+    local.force = False
+    local.install('ipyparallel', 'ipyparallel==8')
+    assert len(commands) == 4
@@ -0,0 +1,65 @@
+import os
+import pytest
+from store import Store, MANIFEST
+
+@pytest.fixture
+def store(aws):
+    return Store(id='test', profile_name=None, region_name='eu-west-1').create()
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(text)
+
+def keys(store):
+    return sorted(item.key for item in store.bucket.objects.all())
+
+def test_prefix_is_a_directory(store, tmp_path):
+    write(str(tmp_path/'src'/'a.txt'), 'a')
+    write(str(tmp_path/'src'/'sub'/'b.txt'), 'b')
+    assert sorted(store.sync_up(str(tmp_path/'src'), prefix='data')) == ['a.txt', 'sub/b.txt']
+    assert keys(store) == ['data/a.txt', 'data/sub/b.txt']
+    # Same directory however the prefix is written
+    assert store.sync_up(str(tmp_path/'src'), prefix='/data/') == []
+    assert sorted(store.sync_down(str(tmp_path/'dst'), prefix='data/')) == ['a.txt', 'sub/b.txt']
+    assert (tmp_path/'dst'/'sub'/'b.txt').read_text() == 'b'
+
+def test_prefix_does_not_match_siblings(store, tmp_path):
+    store.bucket.put_object(Key='data/a.txt', Body=b'a')
+    store.bucket.put_object(Key='dataset/b.txt', Body=b'b')
+    assert store.sync_down(str(tmp_path/'dst'), prefix='data') == ['a.txt']
+
+def test_unchanged_tree_is_skipped(store, tmp_path):
+    write(str(tmp_path/'src'/'a.txt'), 'a')
+    write(str(tmp_path/'src'/'b.txt'), 'b')
+    assert len(store.sync_up(str(tmp_path/'src'), 'data')) == 2
+    assert os.path.exists(str(tmp_path/'src'/MANIFEST))
+    assert store.sync_up(str(tmp_path/'src'), 'data') == []
+    assert store.sync_up(str(tmp_path/'src'), 'data', check=False) == []
+    assert MANIFEST not in [key.split('/')[-1] for key in keys(store)]
+    write(str(tmp_path/'src'/'a.txt'), 'aa')
+    assert store.sync_up(str(tmp_path/'src'), 'data', check=False) == ['a.txt']
+    assert store.sync_down(str(tmp_path/'dst'), 'data') and store.sync_down(str(tmp_path/'dst'), 'data') == []
+
+def test_remote_change_is_uploaded_again(store, tmp_path):
+    write(str(tmp_path/'src'/'a.txt'), 'a')
+    store.sync_up(str(tmp_path/'src'), 'data')
+    # The object changed behind our back, its ETag no longer matches the manifest
+    store.bucket.put_object(Key='data/a.txt', Body=b'other')
+    assert store.sync_up(str(tmp_path/'src'), 'data', check=False) == []
+    assert store.sync_up(str(tmp_path/'src'), 'data') == ['a.txt']
+
+def test_identical_local_file_is_not_downloaded(store, tmp_path):
+    write(str(tmp_path/'src'/'a.txt'), 'a')
+    store.sync_up(str(tmp_path/'src'), 'data')
+    write(str(tmp_path/'dst'/'a.txt'), 'a')
+    assert store.sync_down(str(tmp_path/'dst'), 'data') == []
+
+@pytest.mark.parametrize('key', ['x/../../escape.txt', 'x//escape.txt', 'x/../escape.txt', 'x/' + MANIFEST])
+def test_keys_outside_of_the_directory_are_skipped(store, tmp_path, key):
+    store.bucket.put_object(Key=key, Body=b'escape')
+    store.bucket.put_object(Key='x/ok.txt', Body=b'ok')
+    assert store.sync_down(str(tmp_path/'a'/'dst'), prefix='x/') == ['ok.txt']
+    assert not os.path.exists(str(tmp_path/'escape.txt'))
+    assert not os.path.exists(str(tmp_path/'a'/'escape.txt'))
+    assert not os.path.exists('/escape.txt')
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+from supervisor import Supervisor
+
+def test_wait_for_log_ignores_previous_runs(tmp_path):
+    # A ready line left in the log by a previous run does not count
+    (tmp_path/'daemon.log').write_text('ready\n')
+    supervisor = Supervisor(str(tmp_path))
+    try:
+        process = supervisor.start('daemon', [sys.executable, '-c', 'import time; time.sleep(0.5); print("ready", flush=True); time.sleep(30)'])
+        with pytest.raises(TimeoutError):
+            supervisor.wait_for_log(process, 'ready', timeout=0.2)
+        supervisor.wait_for_log(process, 'ready', timeout=10)
+    finally:
+        supervisor.shutdown()
+
+@pytest.mark.skipif(not hasattr(os, 'sched_getaffinity'), reason='No CPU affinity')
+def test_processes_are_pinned(tmp_path):
+    cpu = min(os.sched_getaffinity(0))
+    supervisor = Supervisor(str(tmp_path))
+    try:
+        process = supervisor.start('pinned', [sys.executable, '-c', 'import os; print(sorted(os.sched_getaffinity(0)), flush=True)'], cpus={cpu})
+        process.popen.wait()
+        supervisor.wait_for_log(process, r'\[{}\]'.format(cpu), timeout=10)
+    finally:
+        supervisor.shutdown()
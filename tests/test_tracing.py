@@ -0,0 +1,21 @@
+import tracing
+
+def test_spans_are_bounded(monkeypatch):
+    monkeypatch.setattr(tracing, 'spans', tracing.deque(maxlen=3))
+    for index in range(5):
+        with tracing.span('span.{}'.format(index), host='h{}'.format(index % 2)):
+            pass
+    assert [item.name for item in tracing.recorded()] == ['span.2', 'span.3', 'span.4']
+    assert [row['count'] for row in tracing.summary(by='host')] in ([2, 1], [1, 2])
+    tracing.clear()
+    assert tracing.recorded() == []
+
+def test_nested_spans_inherit_tags():
+    tracing.clear()
+    with tracing.span('outer', stack='s'):
+        with tracing.tagged(host='h'):
+            with tracing.span('inner'):
+                pass
+    inner, outer = tracing.recorded()
+    assert inner.tags == {'stack': 's', 'host': 'h'} and outer.tags == {'stack': 's'}
+    tracing.clear()
@@ -0,0 +1,51 @@
+import subprocess
+
+# Command printing the GPU count, then one 'cpu,node' line per CPU
+TOPOLOGY_COMMAND = "(nvidia-smi --list-gpus 2>/dev/null || true) | grep -c '^GPU' || true; lscpu -p=CPU,NODE 2>/dev/null | grep -v '^#' || seq 0 $(($(nproc)-1))"
+
+def parse(output):
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    cpus = []
+    for line in lines[1:]:
+        fields = line.split(',')
+        cpus.append((int(fields[0]), int(fields[1]) if len(fields)>1 and fields[1] else 0))
+    return {'gpus': int(lines[0]), 'cpus': [cpu for cpu, node in cpus], 'nodes': {cpu: node for cpu, node in cpus}}
+
+def detect():
+    # Topology of the local host
+    return parse(subprocess.run(TOPOLOGY_COMMAND, shell=True, stdout=subprocess.PIPE, universal_newlines=True).stdout)
+
+def plan(topology, count=None, cores_per_engine=None):
+    # One engine per GPU by default, or per group of cores_per_engine cores, or count engines
+    cpus = sorted(topology['cpus'], key=lambda cpu: (topology['nodes'].get(cpu, 0), cpu))
+    gpus = topology['gpus']
+    if count:
+        size = count
+    elif cores_per_engine:
+        size = max(1, len(cpus)//cores_per_engine)
+    else:
+        size = gpus or 1
+    engines = []
+    for index in range(size):
+        # Contiguous CPU groups, following NUMA nodes
+        group = cpus[index*len(cpus)//size:(index+1)*len(cpus)//size] or [cpus[index%len(cpus)]]
+        engines.append({
+            'name': 'ipengine-{}'.format(index),
+            'gpu': index%gpus if gpus else None,
+            'cpus': group,
+        })
+    return engines
+
+def environment(engine):
+    # Environment variables exposing the engine devices to the engine and its clients
+    result = {'VENOM_ENGINE': engine['name'], 'VENOM_CPUS': ','.join(str(cpu) for cpu in engine['cpus'])}
+    if engine['gpu'] is not None:
+        result['CUDA_VISIBLE_DEVICES'] = str(engine['gpu'])
+    return result
+
+def command(engine, cmd, taskset=True):
+    # Prefix a command with its environment and CPU affinity
+    variables = ' '.join('{}={}'.format(key, value) for key, value in sorted(environment(engine).items()))
+    if taskset:
+        return 'env {} taskset -c {} {}'.format(variables, ','.join(str(cpu) for cpu in engine['cpus']), cmd)
+    return 'env {} {}'.format(variables, cmd)
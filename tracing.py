@@ -0,0 +1,178 @@
+import json
+import time
+import logging
+import threading
+import contextvars
+import concurrent.futures
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import asyncio
+from termcolor import colored
+
+# Tags of the enclosing spans (stack, host...), inherited by asyncio tasks and by the threads of our executors
+tags = contextvars.ContextVar('tags', default={})
+# Finished spans, in completion order, the oldest are dropped beyond MAX_SPANS so that long lived processes
+# (the autoscaler, engines using pool) do not grow without bound
+MAX_SPANS = 100000
+spans = deque(maxlen=MAX_SPANS)
+lock = threading.Lock()
+
+# A timed phase, with the tags in effect when it started
+class Span(object):
+    def __init__(self, name, start, end, tags, thread):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.tags = tags
+        self.thread = thread
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return "Span({}, {:.3f}s)".format(self.name, self.duration)
+
+def record(name, start, end, span_tags):
+    with lock:
+        spans.append(Span(name, start, end, span_tags, threading.current_thread().name))
+
+@contextmanager
+def span(name, **span_tags):
+    # Time the enclosed block, nested spans and spans started from it inherit its tags
+    span_tags = dict(tags.get(), **{key: str(value) for key, value in span_tags.items() if value is not None})
+    token = tags.set(span_tags)
+    start = time.time()
+    try:
+        yield span_tags
+    finally:
+        tags.reset(token)
+        record(name, start, time.time(), span_tags)
+
+@contextmanager
+def tagged(**span_tags):
+    # Tag the spans started from the enclosed block, without timing it
+    token = tags.set(dict(tags.get(), **{key: str(value) for key, value in span_tags.items() if value is not None}))
+    try:
+        yield
+    finally:
+        tags.reset(token)
+
+def traced(name):
+    # Time each call of a function or coroutine function, methods of objects with an id are tagged with it
+    def decorator(function):
+        def arguments(args):
+            if args and isinstance(getattr(args[0], 'id', None), str) and 'stack' not in tags.get():
+                return {'stack': args[0].id}
+            return {}
+        if asyncio.iscoroutinefunction(function):
+            @wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(name, **arguments(args)):
+                    return await function(*args, **kwargs)
+        else:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name, **arguments(args)):
+                    return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class ThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    # Run the submitted functions with the tags of the caller
+    def submit(self, function, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+def instrument(events):
+    # Time every AWS API call of a boto3 client or resource, waiters included
+    def before(context, model, **kwargs):
+        context['venom_start'] = time.time()
+    def after(context, model, **kwargs):
+        if 'venom_start' in context:
+            record('aws.{}'.format(model.name), context.pop('venom_start'), time.time(), dict(tags.get()))
+    events.register('before-call', before, unique_id='venom-trace-before')
+    events.register('after-call', after, unique_id='venom-trace-after')
+
+def clear():
+    with lock:
+        spans.clear()
+
+def recorded():
+    # A copy of the finished spans, iterating the deque while spans are recorded would fail
+    with lock:
+        return list(spans)
+
+def lanes(group):
+    # Spread overlapping spans of a host over lanes where they either nest or follow each other
+    result = []
+    for item in sorted(group, key=lambda item: (item.start, -item.end)):
+        for lane in result:
+            while lane['open'] and lane['open'][-1].end <= item.start:
+                lane['open'].pop()
+            if not lane['open'] or item.end <= lane['open'][-1].end:
+                break
+        else:
+            lane = {'open': [], 'spans': []}
+            result.append(lane)
+        lane['open'].append(item)
+        lane['spans'].append(item)
+    return [lane['spans'] for lane in result]
+
+def chrome(selected=None):
+    # Chrome trace (chrome://tracing, Perfetto) events, one process per stack and one thread group per host
+    selected = recorded() if selected is None else list(selected)
+    origin = min([item.start for item in selected] or [0])
+    groups = {}
+    for item in selected:
+        groups.setdefault((item.tags.get('stack', ''), item.tags.get('host', 'local')), []).append(item)
+    events = []
+    processes = {}
+    thread = 0
+    for (stack, host), group in sorted(groups.items()):
+        if stack not in processes:
+            processes[stack] = len(processes)+1
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': processes[stack], 'args': {'name': stack or 'venom'}})
+        for index, lane in enumerate(lanes(group)):
+            thread += 1
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': processes[stack], 'tid': thread,
+                'args': {'name': host if index == 0 else '{} ({})'.format(host, index)}})
+            for item in lane:
+                events.append({'name': item.name, 'cat': item.name.split('.')[0], 'ph': 'X', 'pid': processes[stack], 'tid': thread,
+                    'ts': round((item.start-origin)*1e6), 'dur': round(item.duration*1e6), 'args': item.tags})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+def export(path, format='chrome'):
+    # Write the trace as Chrome trace events, or as a plain list of spans
+    selected = recorded()
+    if format == 'chrome':
+        data = chrome(selected)
+    else:
+        data = [{'name': item.name, 'start': item.start, 'end': item.end, 'duration': item.duration, 'tags': item.tags, 'thread': item.thread}
+            for item in selected]
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=1)
+    logging.info(colored("{} spans written to {}".format(len(selected), path), 'green'))
+    return path
+
+def summary(by='name'):
+    # Count, total, mean and max duration per span name (or per host), with the host of the slowest span
+    rows = {}
+    for item in recorded():
+        key = item.tags.get('host', 'local') if by == 'host' else item.name
+        row = rows.setdefault(key, {by: key, 'count': 0, 'total': 0, 'max': 0, 'slowest': None})
+        row['count'] += 1
+        row['total'] += item.duration
+        if item.duration >= row['max']:
+            row['max'] = item.duration
+            row['slowest'] = item.tags.get('host', 'local') if by == 'name' else item.name
+    rows = sorted(rows.values(), key=lambda row: -row['total'])
+    for row in rows:
+        row['mean'] = row['total']/row['count']
+    width = max([len(str(row[by])) for row in rows] + [len(by)])
+    lines = ['{:<{width}} {:>6} {:>9} {:>9} {:>9}  {}'.format(by, 'count', 'total', 'mean', 'max', 'slowest', width=width)]
+    for row in rows:
+        lines.append('{:<{width}} {:>6} {:>8.2f}s {:>8.2f}s {:>8.2f}s  {}'.format(
+            row[by], row['count'], row['total'], row['mean'], row['max'], row['slowest'], width=width))
+    logging.info(colored('\n'.join(lines), 'yellow'))
+    return rows
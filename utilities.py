@@ -1,37 +1,79 @@
-import logging
-import socket
-import time
-from fabric.api import env, settings, parallel, serial, roles, execute, sudo, run, local, put, get
-#from fabric.contrib.files import append
-
-def wait_for(action, interval=5, message="Waiting"):
-    while True:
-        logging.info(message)
-        try:
-            execute(action)
-            return
-        except SystemExit as e:
-            logging.info(e)
-            logging.info("Retry")
-            time.sleep(interval)
-
-def wait_for_ssh():
-    wait_for(lambda : run('echo "ssh responding"'), message="Waiting for SSH")
-
-def wait(action, interval=5, message="Waiting", run=run):
-    run('while ! {}; do sleep {}; echo "{}"; done'.format(action, interval, message))
-
-def wait_for_apt():
-    wait('apt update', message="Waiting for APT", run=sudo)
-
-def apt_install(package):
-    wait('apt install {package}'.format(package=package), message="Waiting for APT", run=sudo)
-
-def wait_for_file(path, roles=roles()):
-    wait('cat {}'.format(path), message="Waiting for a file")
-
-def daemon(name, cmd, options='--inherit --respawn'):
-    run('''
+import os
+import json
+import shlex
+import hashlib
+from functools import partial
+from probe import DEADLINE, backoff, tcp, dpkg_unlocked, file_exists
+
+# Where the fingerprints of the provisioning steps done on a host are kept
+STEPS = '~/.venom/steps'
+# Where hosts stage the broadcast files they serve to their peers, by sha256
+BROADCAST = '~/.venom/broadcast'
+
+# Remote primitives, as coroutines running on a remote.Host
+async def run(host, command):
+    # Use a login shell, as Fabric does, to get the conda environment
+    return await host.execute('bash -l -c {}'.format(shlex.quote(command)))
+
+async def sudo(host, command):
+    return await host.execute('sudo bash -l -c {}'.format(shlex.quote(command)))
+
+async def put(host, local_path, remote_path):
+    await host.put(local_path, remote_path)
+
+async def get(host, remote_path, local_path):
+    os.makedirs(os.path.dirname(os.path.expanduser(local_path)), exist_ok=True)
+    await host.get(remote_path, local_path)
+
+async def wait_for(action, message="Waiting", deadline=DEADLINE):
+    # Retry the action with bounded exponential backoff until it succeeds
+    async def check():
+        await action()
+        return True
+    return await backoff(check, deadline=deadline, message=message)
+
+async def wait_for_ssh(host, deadline=DEADLINE):
+    # A cheap TCP probe first, then a command over the SSH connection
+    port = host.options.get('port', 22)
+    await backoff(lambda : tcp(host.name, port), deadline=deadline, message="[{}] Waiting for port {}".format(host, port))
+    await wait_for(lambda : run(host, 'echo "ssh responding"'), message="[{}] Waiting for SSH".format(host), deadline=deadline)
+
+async def wait(host, action, message="Waiting", deadline=DEADLINE):
+    # Until the remote command succeeds
+    async def check():
+        return await host.status(action) == 0
+    await backoff(check, deadline=deadline, message=message)
+
+async def wait_for_apt(host, deadline=DEADLINE):
+    # cloud-init runs apt at boot, wait for the dpkg lock to be released before updating
+    await backoff(partial(dpkg_unlocked, host), deadline=deadline, message="[{}] Waiting for APT".format(host))
+    await wait_for(lambda : sudo(host, 'apt update'), message="[{}] Updating APT".format(host), deadline=deadline)
+
+async def apt_install(host, package, deadline=DEADLINE):
+    async def install():
+        await backoff(partial(dpkg_unlocked, host), deadline=deadline, message="[{}] Waiting for APT".format(host))
+        await sudo(host, 'apt install -y {package}'.format(package=package))
+    await wait_for(install, message="[{}] Installing {}".format(host, package), deadline=deadline)
+
+async def wait_for_file(host, path, deadline=DEADLINE):
+    await backoff(partial(file_exists, host, path), deadline=deadline, message="[{}] Waiting for {}".format(host, path))
+
+async def checksum(host, path):
+    # The sha256 of a remote file, None when it does not exist
+    output = await run(host, 'sha256sum {path} 2>/dev/null || true'.format(path=path))
+    return output.split()[0] if output.strip() else None
+
+async def fetch(host, url, path, sha256):
+    # Download a file, only replacing the destination once its checksum is verified
+    await run(host, 'mkdir -p $(dirname {path}) && curl -sfSL --retry 5 -o {path}.part "{url}" && echo "{sha256}  {path}.part" | sha256sum -c --quiet && mv {path}.part {path}'.format(
+        path=path, url=url, sha256=sha256))
+
+async def private_address(host):
+    # The address of the primary interface, in the VPC
+    return (await run(host, "hostname -I | awk '{print $1}'")).strip()
+
+async def daemon(host, name, cmd, options='--inherit --respawn'):
+    await run(host, '''
 if (daemon --name="{name}" --running)
 then
     daemon --name="{name}" --restart
@@ -40,8 +82,21 @@ else
 fi
 '''.format(name=name, cmd=cmd, options=options))
 
-def write(path, text, run=run):
-    run("echo '{text}' > {path}".format(path=path, text=text))
+async def stop_daemon(host, name):
+    await run(host, 'daemon --name="{name}" --stop || true'.format(name=name))
+
+async def write(host, path, text, run=run):
+    await run(host, "echo '{text}' > {path}".format(path=path, text=text))
+
+async def append(host, path, text, run=run):
+    await run(host, "echo '{text}' >> {path}".format(path=path, text=text))
+
+def fingerprint(name, inputs):
+    return hashlib.sha256(json.dumps([name, inputs], sort_keys=True).encode()).hexdigest()
+
+async def get_fingerprints(host):
+    output = await run(host, 'mkdir -p {steps}; for step in {steps}/*; do [ -f "$step" ] && echo "$(basename "$step") $(cat "$step")"; done; true'.format(steps=STEPS))
+    return dict(line.split() for line in output.splitlines() if line.strip())
 
-def append(path, text, run=run):
-    run("echo '{text}' >> {path}".format(path=path, text=text))
+async def set_fingerprint(host, name, value):
+    await write(host, '{}/{}'.format(STEPS, name), value)
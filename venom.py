@@ -1,7 +1,6 @@
-import os
 import time
-import signal
 import logging
+import argparse
 from stack import Oath, Home, Local, OATH_TAGS
 
 '''
@@ -13,17 +12,19 @@ awsfed --account=aolp-dev --browser_sso=True
 
 # Run the main program
 if __name__ == '__main__':
-    #os.setpgrp()
-    pgrp = os.getpgrp()
-    print(pgrp)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--force', action='store_true', help='Re-run provisioning steps that are up to date')
+    args = parser.parse_args()
     logging.basicConfig(level=logging.INFO)
     # stk = Oath(size=5, id='test-ng')
-    stk = Local(size=5, id='test-local')
+    stk = Local(id='test-local')
     stk.create()
     try:
-        stk.setup()
+        stk.setup(force=args.force)
         while True:
             time.sleep(1)
+    except KeyboardInterrupt:
+        logging.info("Interrupted")
     finally:
+        # Local processes are supervised, terminate shuts them down gracefully
         stk.terminate()
-        os.killpg(pgrp, signal.SIGKILL)